@@ -39,6 +39,213 @@ def main():
             except Exception as e:
                 print(f"⚠️  Note: {e}")
             
+            # Precompute challenge durations so progress marking never parses strings
+            print("\n📋 Adding duration_days column to challenges table...")
+            try:
+                db.session.execute(text("ALTER TABLE challenges ADD COLUMN IF NOT EXISTS duration_days INTEGER"))
+                db.session.execute(text(
+                    "UPDATE challenges SET duration_days = "
+                    "COALESCE(NULLIF(substring(duration from '[0-9]+'), '')::int, 30) "
+                    "WHERE duration_days IS NULL"
+                ))
+                db.session.execute(text("UPDATE challenges SET duration_days = 30 WHERE duration_days <= 0"))
+                db.session.commit()
+                print("✓ duration_days column added and backfilled!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+                db.session.rollback()
+            
+            # Indexes for keyset pagination and catalogue filters
+            print("\n📋 Adding challenge catalogue indexes...")
+            try:
+                db.session.execute(text("UPDATE challenges SET created_at = NOW() WHERE created_at IS NULL"))
+                db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_challenges_created_at_id ON challenges (created_at, id)"))
+                db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_challenges_type ON challenges (type)"))
+                db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_challenges_difficulty ON challenges (difficulty)"))
+                db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_challenges_goal ON challenges (goal)"))
+                db.session.commit()
+                print("✓ Challenge catalogue indexes created!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+                db.session.rollback()
+            
+            # Content fingerprints for generated challenges
+            print("\n📋 Adding fingerprint column to challenges table...")
+            try:
+                db.session.execute(text("ALTER TABLE challenges ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(64)"))
+                db.session.commit()
+                
+                # Only the oldest copy of repeated content gets the fingerprint
+                seen = set()
+                for challenge in Challenge.query.filter(Challenge.fingerprint.is_(None)).order_by(Challenge.id).all():
+                    fingerprint = Challenge.compute_fingerprint(
+                        challenge.title, challenge.type, challenge.duration, challenge.difficulty, challenge.goal
+                    )
+                    if fingerprint not in seen:
+                        challenge.fingerprint = fingerprint
+                        seen.add(fingerprint)
+                db.session.commit()
+                print(f"✓ Fingerprinted {len(seen)} new distinct challenges!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+                db.session.rollback()
+            
+            # Links from shared generated challenges to the users they were generated for
+            print("\n📋 Creating challenge suggestions table...")
+            try:
+                from app.models.challenge import ChallengeSuggestion
+                ChallengeSuggestion.__table__.create(db.engine, checkfirst=True)
+                
+                # Earlier schema kept a per-user copy of generated content; turn owners into links
+                owned = db.session.execute(text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'challenges' AND column_name = 'created_by_user_id'"
+                )).first()
+                if owned:
+                    db.session.execute(text(
+                        "INSERT INTO challenge_suggestions (user_id, challenge_id, suggested_at) "
+                        "SELECT created_by_user_id, id, created_at FROM challenges WHERE created_by_user_id IS NOT NULL "
+                        "ON CONFLICT (user_id, challenge_id) DO NOTHING"
+                    ))
+                    # Keep one fingerprinted row per content, preferring the formerly global one
+                    db.session.execute(text(
+                        "UPDATE challenges SET fingerprint = NULL WHERE id IN ("
+                        "SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+                        "PARTITION BY fingerprint ORDER BY created_by_user_id IS NOT NULL, id) AS copy "
+                        "FROM challenges WHERE fingerprint IS NOT NULL) copies WHERE copy > 1)"
+                    ))
+                    db.session.execute(text("DROP INDEX IF EXISTS ux_challenges_fingerprint_owner"))
+                    db.session.execute(text("DROP INDEX IF EXISTS ux_challenges_fingerprint_global"))
+                    db.session.execute(text("ALTER TABLE challenges DROP COLUMN created_by_user_id"))
+                db.session.execute(text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS ux_challenges_fingerprint ON challenges (fingerprint)"
+                ))
+                db.session.commit()
+                print("✓ Challenge suggestions table created and generated challenges shared!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+                db.session.rollback()
+            
+            # Leaderboard summary, seeded from existing progress
+            print("\n📋 Creating challenge leaderboard table...")
+            try:
+                from app.models.challenge import ChallengeLeaderboardEntry
+                ChallengeLeaderboardEntry.__table__.create(db.engine, checkfirst=True)
+                db.session.execute(text(
+                    "INSERT INTO challenge_leaderboard (challenge_id, user_id, days_completed, last_progress_at) "
+                    "SELECT uc.challenge_id, uc.user_id, COUNT(cp.id), MAX(cp.created_at) "
+                    "FROM user_challenges uc JOIN challenge_progress cp ON cp.user_challenge_id = uc.id "
+                    "GROUP BY uc.challenge_id, uc.user_id "
+                    "ON CONFLICT (challenge_id, user_id) DO NOTHING"
+                ))
+                db.session.commit()
+                print("✓ Challenge leaderboard table created and seeded!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+                db.session.rollback()
+            
+            # Cached streak columns, rebuilt once from progress history
+            print("\n📋 Adding streak columns to user_challenges table...")
+            try:
+                db.session.execute(text("ALTER TABLE user_challenges ADD COLUMN IF NOT EXISTS current_streak INTEGER NOT NULL DEFAULT 0"))
+                db.session.execute(text("ALTER TABLE user_challenges ADD COLUMN IF NOT EXISTS longest_streak INTEGER NOT NULL DEFAULT 0"))
+                db.session.execute(text("ALTER TABLE user_challenges ADD COLUMN IF NOT EXISTS last_progress_date DATE"))
+                db.session.commit()
+                
+                from app.services.streak_service import streaks
+                user_challenge_ids = [row[0] for row in db.session.query(UserChallenge.id).all()]
+                rebuilt = streaks.recompute(user_challenge_ids)
+                db.session.commit()
+                print(f"✓ Streak columns added, {rebuilt} streaks rebuilt!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+                db.session.rollback()
+            
+            # Queue for asynchronous AI generation
+            print("\n📋 Creating generation jobs table...")
+            try:
+                from app.models.generation_job import GenerationJob
+                GenerationJob.__table__.create(db.engine, checkfirst=True)
+                print("✓ Generation jobs table created!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+            
+            # Shared table for cached AI responses
+            print("\n📋 Creating AI response cache table...")
+            try:
+                from app.models.ai_response_cache import AIResponseCache
+                AIResponseCache.__table__.create(db.engine, checkfirst=True)
+                print("✓ AI response cache table created!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+            
+            # Daily macro totals from structured diet plans
+            print("\n📋 Adding macro total columns to diet_plans table...")
+            try:
+                db.session.execute(text("ALTER TABLE diet_plans ADD COLUMN IF NOT EXISTS total_calories INTEGER"))
+                db.session.execute(text("ALTER TABLE diet_plans ADD COLUMN IF NOT EXISTS protein_g DOUBLE PRECISION"))
+                db.session.execute(text("ALTER TABLE diet_plans ADD COLUMN IF NOT EXISTS carbs_g DOUBLE PRECISION"))
+                db.session.execute(text("ALTER TABLE diet_plans ADD COLUMN IF NOT EXISTS fat_g DOUBLE PRECISION"))
+                db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_diet_plans_total_calories ON diet_plans (total_calories)"))
+                # Only plans generated with the structured schema carry totals; legacy text plans stay NULL
+                result = db.session.execute(text("""
+                    UPDATE diet_plans SET
+                        total_calories = ROUND((diet_plan::jsonb #>> '{meal_plan,totals,calories}')::numeric),
+                        protein_g = (diet_plan::jsonb #>> '{meal_plan,totals,protein_g}')::double precision,
+                        carbs_g = (diet_plan::jsonb #>> '{meal_plan,totals,carbs_g}')::double precision,
+                        fat_g = (diet_plan::jsonb #>> '{meal_plan,totals,fat_g}')::double precision
+                    WHERE total_calories IS NULL
+                      AND jsonb_typeof(diet_plan::jsonb #> '{meal_plan,totals}') = 'object'
+                """))
+                db.session.commit()
+                print(f"✓ Macro columns added, {result.rowcount} plans backfilled!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+                db.session.rollback()
+            
+            # Precomputed challenge suggestions per cohort
+            print("\n📋 Creating challenge pools table...")
+            try:
+                from app.models.challenge_pool import ChallengePool
+                ChallengePool.__table__.create(db.engine, checkfirst=True)
+                print("✓ Challenge pools table created! Run precompute_challenge_pools.py to fill it.")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+            
+            # Conversation threads with rolling summaries
+            print("\n📋 Creating chat threads table...")
+            try:
+                from app.models.chat_thread import ChatThread
+                ChatThread.__table__.create(db.engine, checkfirst=True)
+                db.session.execute(text("ALTER TABLE chatbot_queries ADD COLUMN IF NOT EXISTS thread_id INTEGER REFERENCES chat_threads(id) ON DELETE CASCADE"))
+                db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_chatbot_queries_thread_id_id ON chatbot_queries (thread_id, id)"))
+                db.session.commit()
+                print("✓ Chat threads table created and thread_id added to chatbot_queries!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+                db.session.rollback()
+            
+            # Curated FAQ answers for similarity retrieval
+            print("\n📋 Adding FAQ columns to chatbot_queries table...")
+            try:
+                db.session.execute(text("ALTER TABLE chatbot_queries ADD COLUMN IF NOT EXISTS is_faq BOOLEAN NOT NULL DEFAULT FALSE"))
+                db.session.execute(text("ALTER TABLE chatbot_queries ADD COLUMN IF NOT EXISTS faq_updated_at TIMESTAMP"))
+                db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_chatbot_queries_faq_updated_at ON chatbot_queries (faq_updated_at)"))
+                db.session.commit()
+                print("✓ FAQ columns added! Curate answers with POST /api/chatbot/<id>/faq")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+                db.session.rollback()
+            
+            # Metrics published by processes that serve no HTTP, merged into /health/ai
+            print("\n📋 Creating AI metrics snapshots table...")
+            try:
+                from app.models.ai_metrics_snapshot import AIMetricsSnapshot
+                AIMetricsSnapshot.__table__.create(db.engine, checkfirst=True)
+                print("✓ AI metrics snapshots table created!")
+            except Exception as e:
+                print(f"⚠️  Note: {e}")
+            
             # Verify tables
             from sqlalchemy import inspect
             inspector = inspect(db.engine)
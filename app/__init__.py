@@ -156,6 +156,13 @@ def create_app():
     except Exception as e:
         print(f"✗ Error loading challenge routes: {e}")
 
+    try:
+        from app.routes.jobs import bp as jobs_bp
+        app.register_blueprint(jobs_bp)
+        print("✓ Registered job routes")
+    except Exception as e:
+        print(f"✗ Error loading job routes: {e}")
+
     print("✓ All routes registered\n")
 
     return app
@@ -5,7 +5,12 @@ from app.models.workout import Workout
 from app.models.diet_plan import DietPlan
 from app.models.exercise_plan import ExercisePlan
 from app.models.chatbot_query import ChatbotQuery
-from app.models.challenge import Challenge, UserChallenge, ChallengeProgress
+from app.models.chat_thread import ChatThread
+from app.models.challenge import Challenge, UserChallenge, ChallengeProgress, ChallengeLeaderboardEntry, ChallengeSuggestion
+from app.models.generation_job import GenerationJob
+from app.models.ai_response_cache import AIResponseCache
+from app.models.challenge_pool import ChallengePool
+from app.models.ai_metrics_snapshot import AIMetricsSnapshot
 
 __all__ = [
     'Role',
@@ -15,7 +20,14 @@ __all__ = [
     'DietPlan',
     'ExercisePlan',
     'ChatbotQuery',
+    'ChatThread',
     'Challenge',
     'UserChallenge',
-    'ChallengeProgress'
+    'ChallengeProgress',
+    'ChallengeLeaderboardEntry',
+    'ChallengeSuggestion',
+    'GenerationJob',
+    'AIResponseCache',
+    'ChallengePool',
+    'AIMetricsSnapshot'
 ]
\ No newline at end of file
@@ -0,0 +1,11 @@
+from app import db
+from datetime import datetime
+
+class AIMetricsSnapshot(db.Model):
+    __tablename__ = 'ai_metrics_snapshots'
+    
+    process_key = db.Column(db.String(100), primary_key=True)  # role:hostname:pid
+    role = db.Column(db.String(20), nullable=False)  # worker, ...
+    metrics = db.Column(db.JSON, nullable=False)  # AIMetrics.export()
+    caches = db.Column(db.JSON)  # Raw cache counters, e.g. {'diet_plan': DietPlanCache.raw_stats()}
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,16 @@
+from app import db
+from datetime import datetime
+
+class AIResponseCache(db.Model):
+    __tablename__ = 'ai_response_cache'
+    
+    cache_key = db.Column(db.String(64), primary_key=True)  # sha256 of namespace + normalized request
+    namespace = db.Column(db.String(50), nullable=False)  # diet_plan, ...
+    request_key = db.Column(db.JSON)  # Normalized request the key was built from
+    response = db.Column(db.JSON, nullable=False)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_hit_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Eviction drops expired rows and the least recently hit ones per namespace
+    __table_args__ = (db.Index('ix_ai_response_cache_namespace_last_hit', 'namespace', 'last_hit_at'),)
@@ -1,21 +1,62 @@
 from app import db
+from sqlalchemy.orm import validates
 from datetime import datetime
+import hashlib
+import re
+
+DEFAULT_DURATION_DAYS = 30
 
 class Challenge(db.Model):
     __tablename__ = 'challenges'
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    type = db.Column(db.String(50))  # Strength, Core, Cardio, etc.
+    type = db.Column(db.String(50), index=True)  # Strength, Core, Cardio, etc.
     duration = db.Column(db.String(50))  # "30 Days", "7 Days", etc.
-    difficulty = db.Column(db.String(20))  # Beginner, Intermediate, Advanced
-    goal = db.Column(db.String(50))  # Weight Loss, Strength, etc.
+    duration_days = db.Column(db.Integer, default=DEFAULT_DURATION_DAYS)  # Parsed from duration on write
+    difficulty = db.Column(db.String(20), index=True)  # Beginner, Intermediate, Advanced
+    goal = db.Column(db.String(50), index=True)  # Weight Loss, Strength, etc.
     description = db.Column(db.Text)
     is_ai_generated = db.Column(db.Boolean, default=False)  # True if generated by Gemini
+    fingerprint = db.Column(db.String(64))  # Normalized content hash, see compute_fingerprint
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     user_challenges = db.relationship('UserChallenge', backref='challenge', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest first
+        db.Index('ix_challenges_created_at_id', 'created_at', 'id'),
+        # Repeated content is stored once and shared; who asked for it lives in challenge_suggestions
+        db.Index('ux_challenges_fingerprint', 'fingerprint', unique=True),
+    )
+    
+    @validates('duration')
+    def _sync_duration_days(self, key, duration):
+        self.duration_days = self.parse_duration_days(duration)
+        return duration
+    
+    @staticmethod
+    def parse_duration_days(duration):
+        """Parse "30 Days" style durations into a positive day count"""
+        match = re.search(r'\d+', duration or '')
+        days = int(match.group()) if match else 0
+        return days if days > 0 else DEFAULT_DURATION_DAYS
+    
+    @staticmethod
+    def compute_fingerprint(title, type, duration, difficulty, goal):
+        """Hash of the normalized content so near-identical challenges collide"""
+        def normalize(value):
+            return re.sub(r'[^0-9a-z]+', '', (value or '').casefold())
+        
+        parts = [
+            normalize(title),
+            normalize(type),
+            str(Challenge.parse_duration_days(duration)),
+            normalize(difficulty),
+            normalize(goal)
+        ]
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
 
 class UserChallenge(db.Model):
     __tablename__ = 'user_challenges'
@@ -27,6 +68,9 @@ class UserChallenge(db.Model):
     progress_percentage = db.Column(db.Float, default=0.0)
     is_completed = db.Column(db.Boolean, default=False)
     completed_at = db.Column(db.DateTime, nullable=True)
+    current_streak = db.Column(db.Integer, nullable=False, default=0)  # Consecutive days ending at last_progress_date
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+    last_progress_date = db.Column(db.Date, nullable=True)
     
     # Relationships
     progress_entries = db.relationship('ChallengeProgress', backref='user_challenge', lazy=True, cascade='all, delete-orphan')
@@ -42,6 +86,28 @@ class ChallengeProgress(db.Model):
     progress_date = db.Column(db.Date, nullable=False)  # Date when progress was marked
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Unique constraint: one progress entry per day per challenge
+    # Unique constraint: one progress entry per day per challenge. Its index on
+    # (user_challenge_id, progress_date) also serves date-range scans such as the heatmap.
     __table_args__ = (db.UniqueConstraint('user_challenge_id', 'progress_date', name='unique_daily_progress'),)
 
+
+class ChallengeLeaderboardEntry(db.Model):
+    __tablename__ = 'challenge_leaderboard'
+    
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    days_completed = db.Column(db.Integer, nullable=False, default=0)  # Number of days progress was marked
+    last_progress_at = db.Column(db.DateTime)  # Tie-breaker: earlier is ranked higher
+    
+    __table_args__ = (db.Index('ix_challenge_leaderboard_rank', 'challenge_id', 'days_completed', 'last_progress_at'),)
+
+
+class ChallengeSuggestion(db.Model):
+    __tablename__ = 'challenge_suggestions'
+    
+    # Links a generated challenge to each user it was generated for
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id', ondelete='CASCADE'), primary_key=True)
+    suggested_at = db.Column(db.DateTime, default=datetime.utcnow)  # Latest time it was suggested to the user
+    
+    __table_args__ = (db.Index('ix_challenge_suggestions_user_id_suggested_at', 'user_id', 'suggested_at'),)
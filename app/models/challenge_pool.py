@@ -0,0 +1,12 @@
+from app import db
+from datetime import datetime
+
+class ChallengePool(db.Model):
+    __tablename__ = 'challenge_pools'
+    
+    cohort_key = db.Column(db.String(150), primary_key=True)  # goal|activity_level|age_band
+    goal = db.Column(db.String(50), nullable=False)
+    activity_level = db.Column(db.String(50), nullable=False)
+    age_band = db.Column(db.String(20), nullable=False)
+    suggestions = db.Column(db.JSON, nullable=False)  # Same shape GeminiService.suggest_challenges returns
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
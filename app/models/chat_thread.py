@@ -0,0 +1,16 @@
+from app import db
+from datetime import datetime
+
+class ChatThread(db.Model):
+    __tablename__ = 'chat_threads'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    title = db.Column(db.String(200))
+    # Rolling summary of every turn up to summarized_through_id; newer turns are sent verbatim
+    summary = db.Column(db.Text)
+    summarized_through_id = db.Column(db.Integer, nullable=False, default=0)
+    summarized_turns = db.Column(db.Integer, nullable=False, default=0)
+    turn_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
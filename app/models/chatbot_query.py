@@ -10,3 +10,10 @@ class ChatbotQuery(db.Model):
     answer = db.Column(db.Text)
     query_type = db.Column(db.String(50))  # diet, workout, yoga, general
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    thread_id = db.Column(db.Integer, db.ForeignKey('chat_threads.id', ondelete='CASCADE'), nullable=True)
+    # Curated answers served by similarity search; faq_updated_at drives incremental index syncs
+    is_faq = db.Column(db.Boolean, nullable=False, default=False)
+    faq_updated_at = db.Column(db.DateTime, index=True)
+    
+    # Context building reads a thread's latest turns
+    __table_args__ = (db.Index('ix_chatbot_queries_thread_id_id', 'thread_id', 'id'),)
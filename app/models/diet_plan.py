@@ -10,4 +10,9 @@ class DietPlan(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     goal = db.Column(db.String(50))
     diet_type = db.Column(db.String(50))
-    duration = db.Column(db.String(50))
\ No newline at end of file
+    duration = db.Column(db.String(50))
+    # Daily totals copied from the structured plan so they can be filtered and aggregated
+    total_calories = db.Column(db.Integer, index=True)
+    protein_g = db.Column(db.Float)
+    carbs_g = db.Column(db.Float)
+    fat_g = db.Column(db.Float)
\ No newline at end of file
@@ -0,0 +1,22 @@
+from app import db
+from datetime import datetime
+import uuid
+
+class GenerationJob(db.Model):
+    __tablename__ = 'generation_jobs'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    kind = db.Column(db.String(50), nullable=False)  # diet_plan, challenges, chat_summary
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    payload = db.Column(db.JSON, nullable=False)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    # Workers claim the oldest queued job
+    __table_args__ = (db.Index('ix_generation_jobs_status_created_at', 'status', 'created_at'),)
+
@@ -1,59 +1,84 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app import db
 from app.models.user import User
-from app.models.challenge import Challenge, UserChallenge, ChallengeProgress
-from app.services.gemini_service import GeminiService
-from datetime import datetime, date
+from app.models.challenge import Challenge, UserChallenge, ChallengeProgress, DEFAULT_DURATION_DAYS
+from app.services.challenge_catalog import catalog
+from app.services import challenge_pool, job_service
+from app.services.ai_metrics import metrics
+from app.services.challenge_service import save_generated_challenges
+from app.services.gemini_service import DEFAULT_CHALLENGES, router
+from app.services.leaderboard_service import leaderboards
+from app.services.streak_service import streaks
+from datetime import datetime, date, timedelta
 
 bp = Blueprint('challenge', __name__, url_prefix='/api/challenges')
-gemini = GeminiService()
+MAX_BATCH_SIZE = 50
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+DEFAULT_HEATMAP_DAYS = 365
+MAX_HEATMAP_DAYS = 731
 
 # ============= GET ALL CHALLENGES (with user's join status) =============
 @bp.route('/', methods=['GET'])
 @jwt_required()
 def get_all_challenges():
-    """Get all challenges with user's join status and progress"""
+    """Get a page of challenges with user's join status and progress"""
     try:
         user_id = get_jwt_identity()
+        today = date.today()
         
-        # Get all challenges
-        challenges = Challenge.query.all()
-        
-        # Get user's joined challenges
-        user_challenges = UserChallenge.query.filter_by(user_id=user_id).all()
-        user_challenge_dict = {uc.challenge_id: uc for uc in user_challenges}
+        # Keyset pagination and filters
+        limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+        cursor = request.args.get('cursor')
+        filters = {
+            'type': request.args.get('type'),
+            'difficulty': request.args.get('difficulty'),
+            'goal': request.args.get('goal')
+        }
+        is_ai_generated = request.args.get('is_ai_generated')
+        if is_ai_generated is not None:
+            filters['is_ai_generated'] = is_ai_generated.lower() == 'true'
+        
+        try:
+            challenges, next_cursor = catalog.get_page(filters, cursor, limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # The user-specific overlay: join state and today's progress in one query
+        rows = db.session.query(UserChallenge, ChallengeProgress.id)\
+            .outerjoin(ChallengeProgress, db.and_(
+                ChallengeProgress.user_challenge_id == UserChallenge.id,
+                ChallengeProgress.progress_date == today
+            ))\
+            .filter(
+                UserChallenge.user_id == user_id,
+                UserChallenge.challenge_id.in_([challenge['id'] for challenge in challenges])
+            )\
+            .all() if challenges else []
+        joined = {uc.challenge_id: (uc, today_progress_id) for uc, today_progress_id in rows}
         
         result = []
-        today = date.today()
         for challenge in challenges:
-            user_challenge = user_challenge_dict.get(challenge.id)
+            user_challenge, today_progress_id = joined.get(challenge['id'], (None, None))
             can_mark_today = True
             if user_challenge:
-                # Check if progress already marked today
-                today_progress = ChallengeProgress.query.filter_by(
-                    user_challenge_id=user_challenge.id,
-                    progress_date=today
-                ).first()
-                can_mark_today = today_progress is None and not user_challenge.is_completed
+                can_mark_today = today_progress_id is None and not user_challenge.is_completed
             
             result.append({
-                'id': challenge.id,
-                'title': challenge.title,
-                'type': challenge.type,
-                'duration': challenge.duration,
-                'difficulty': challenge.difficulty,
-                'goal': challenge.goal,
-                'description': challenge.description,
-                'is_ai_generated': challenge.is_ai_generated,
+                **challenge,
                 'is_joined': user_challenge is not None,
                 'progress': user_challenge.progress_percentage if user_challenge else 0,
                 'is_completed': user_challenge.is_completed if user_challenge else False,
-                'can_mark_today': can_mark_today,
-                'created_at': challenge.created_at.isoformat()
+                'can_mark_today': can_mark_today
             })
         
-        return jsonify({'challenges': result}), 200
+        return jsonify({
+            'challenges': result,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -81,37 +106,36 @@ def generate_challenges():
             'goal': request.json.get('goal')
         }
         
-        # Generate challenges using Gemini
-        ai_challenges = gemini.suggest_challenges(user_data)
-        
-        # Save challenges to database
-        created_challenges = []
-        for challenge_data in ai_challenges:
-            challenge = Challenge(
-                title=challenge_data.get('title'),
-                type=challenge_data.get('type'),
-                duration=challenge_data.get('duration'),
-                difficulty=challenge_data.get('difficulty'),
-                goal=challenge_data.get('goal'),
-                description=challenge_data.get('description', ''),
-                is_ai_generated=True
-            )
-            db.session.add(challenge)
-            created_challenges.append({
-                'title': challenge.title,
-                'type': challenge.type,
-                'duration': challenge.duration,
-                'difficulty': challenge.difficulty,
-                'goal': challenge.goal,
-                'description': challenge.description
-            })
+        # Serve the cohort's precomputed pool when it is fresh
+        cohort = challenge_pool.cohort_for(user_data)
+        suggestions = challenge_pool.fresh_pool(cohort)
+        metrics.increment('suggest_challenges', 'pool_misses' if suggestions is None else 'pool_hits')
+        source = 'pool'
+        if suggestions is None and router.unavailable_for(structured=True) is not None:
+            # A job would only fail: fall back to the stale pool, or the static set, right away
+            suggestions = challenge_pool.stored_pool(cohort)
+            source = 'stale_pool'
+            if suggestions is None:
+                suggestions, source = DEFAULT_CHALLENGES, 'fallback'
+        if suggestions is not None:
+            challenges = save_generated_challenges(user_id, suggestions)
+            db.session.commit()
+            return jsonify({
+                'message': 'Challenges generated successfully',
+                'challenges': challenges,
+                'source': source
+            }), 201
         
+        # Otherwise hand the Gemini call to the generation worker, which also fills the pool
+        job = job_service.enqueue(user_id, 'challenges', user_data)
         db.session.commit()
         
         return jsonify({
-            'message': 'Challenges generated successfully',
-            'challenges': created_challenges
-        }), 201
+            'message': 'Challenge generation queued',
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/api/jobs/{job.id}'
+        }), 202
         
     except Exception as e:
         db.session.rollback()
@@ -174,57 +198,26 @@ def mark_progress(challenge_id):
     try:
         user_id = get_jwt_identity()
         today = date.today()
+        now = datetime.utcnow()
         
-        # Get user challenge
-        user_challenge = UserChallenge.query.filter_by(
-            user_id=user_id,
-            challenge_id=challenge_id
-        ).first()
-        
-        if not user_challenge:
-            return jsonify({'error': 'Challenge not joined'}), 404
-        
-        if user_challenge.is_completed:
-            return jsonify({'error': 'Challenge already completed'}), 400
+        inserted = _insert_todays_progress(user_id, [challenge_id], today, now)
         
-        # Check if already marked today
-        existing_progress = ChallengeProgress.query.filter_by(
-            user_challenge_id=user_challenge.id,
-            progress_date=today
-        ).first()
+        if not inserted:
+            db.session.rollback()
+            return _progress_rejection(user_id, challenge_id)
         
-        if existing_progress:
-            return jsonify({
-                'error': 'Progress already marked for today',
-                'already_marked': True
-            }), 400
-        
-        # Calculate new progress (assuming each day is 10% for simplicity)
-        # You can adjust this logic based on challenge duration
-        duration_days = int(user_challenge.challenge.duration.split()[0]) if user_challenge.challenge.duration else 30
-        progress_increment = 100.0 / duration_days
-        
-        new_progress = min(user_challenge.progress_percentage + progress_increment, 100.0)
-        user_challenge.progress_percentage = new_progress
-        
-        # Mark as completed if progress reaches 100%
-        if new_progress >= 100.0:
-            user_challenge.is_completed = True
-            user_challenge.completed_at = datetime.utcnow()
-        
-        # Create progress entry
-        progress_entry = ChallengeProgress(
-            user_challenge_id=user_challenge.id,
-            progress_date=today
-        )
+        advanced = _advance_progress(inserted, today, now)
+        leaderboards.record_progress(user_id, [challenge_id], now)
+        streaks.invalidate_user(user_id)
         
-        db.session.add(progress_entry)
         db.session.commit()
         
+        new_progress, is_completed, current_streak = advanced[challenge_id]
         return jsonify({
             'message': 'Progress marked successfully',
             'progress': new_progress,
-            'is_completed': user_challenge.is_completed,
+            'is_completed': is_completed,
+            'current_streak': current_streak,
             'already_marked': False
         }), 200
         
@@ -233,6 +226,138 @@ def mark_progress(challenge_id):
         return jsonify({'error': str(e)}), 500
 
 
+# ============= BATCH MARK PROGRESS =============
+@bp.route('/progress/batch', methods=['POST'])
+@jwt_required()
+def mark_progress_batch():
+    """Mark today's progress for several challenges with a single commit"""
+    try:
+        user_id = get_jwt_identity()
+        today = date.today()
+        now = datetime.utcnow()
+        data = request.get_json() or {}
+        
+        challenge_ids = data.get('challenge_ids')
+        if not isinstance(challenge_ids, list) or not challenge_ids:
+            return jsonify({'error': 'challenge_ids must be a non-empty list'}), 400
+        if len(challenge_ids) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_BATCH_SIZE} challenges can be marked at once'}), 400
+        try:
+            challenge_ids = list(dict.fromkeys(int(cid) for cid in challenge_ids))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'challenge_ids must contain integers'}), 400
+        
+        # Resolve every requested challenge for this user in one query. Plain columns rather than
+        # ORM objects, which commit() would expire and reload one by one below.
+        joined = dict(
+            db.session.query(UserChallenge.challenge_id, UserChallenge.is_completed).filter(
+                UserChallenge.user_id == user_id,
+                UserChallenge.challenge_id.in_(challenge_ids)
+            ).all()
+        )
+        
+        inserted = _insert_todays_progress(user_id, challenge_ids, today, now)
+        advanced = _advance_progress(inserted, today, now) if inserted else {}
+        if advanced:
+            leaderboards.record_progress(user_id, list(advanced), now)
+            streaks.invalidate_user(user_id)
+        
+        db.session.commit()
+        
+        results = []
+        for challenge_id in challenge_ids:
+            item = {'challenge_id': challenge_id}
+            if challenge_id in advanced:
+                new_progress, is_completed, current_streak = advanced[challenge_id]
+                item.update({
+                    'status': 'marked',
+                    'progress': new_progress,
+                    'is_completed': is_completed,
+                    'current_streak': current_streak
+                })
+            elif challenge_id not in joined:
+                item['status'] = 'not_joined'
+            elif joined[challenge_id]:
+                item['status'] = 'completed'
+            else:
+                item['status'] = 'already_marked'
+            results.append(item)
+        
+        return jsonify({
+            'marked': len(advanced),
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _insert_todays_progress(user_id, challenge_ids, today, now):
+    """Insert today's entries for joined, unfinished challenges in one statement"""
+    # The unique daily constraint turns a concurrent duplicate tap into a no-op
+    joined = db.select(UserChallenge.id, db.literal(today), db.literal(now))\
+        .where(
+            UserChallenge.user_id == user_id,
+            UserChallenge.challenge_id.in_(challenge_ids),
+            UserChallenge.is_completed.is_(False)
+        )
+    return db.session.execute(
+        pg_insert(ChallengeProgress)
+        .from_select(['user_challenge_id', 'progress_date', 'created_at'], joined)
+        .on_conflict_do_nothing(constraint='unique_daily_progress')
+        .returning(ChallengeProgress.user_challenge_id)
+    ).scalars().all()
+
+
+def _advance_progress(user_challenge_ids, today, now):
+    """Advance progress and streaks in place; returns {challenge_id: (progress, is_completed, current_streak)}"""
+    # Derived from the count of marked days (today's row included) rather than accumulated
+    # 100/duration steps, which drift in floating point and can stop just short of 100
+    days_marked = db.select(db.func.count())\
+        .where(ChallengeProgress.user_challenge_id == UserChallenge.id)\
+        .scalar_subquery()
+    duration_days = db.func.coalesce(Challenge.duration_days, DEFAULT_DURATION_DAYS)
+    completed = days_marked >= duration_days
+    new_progress = db.case((completed, 100.0), else_=100.0 * days_marked / duration_days)
+    rows = db.session.execute(
+        db.update(UserChallenge)
+        .where(UserChallenge.id.in_(user_challenge_ids), Challenge.id == UserChallenge.challenge_id)
+        .values(
+            progress_percentage=new_progress,
+            is_completed=completed,
+            completed_at=db.case((completed, now), else_=UserChallenge.completed_at),
+            **streaks.advance_values(today)
+        )
+        .returning(
+            UserChallenge.challenge_id,
+            UserChallenge.progress_percentage,
+            UserChallenge.is_completed,
+            UserChallenge.current_streak
+        )
+    ).all()
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+
+def _progress_rejection(user_id, challenge_id):
+    """Explain why no progress row was inserted for today"""
+    user_challenge = UserChallenge.query.filter_by(
+        user_id=user_id,
+        challenge_id=challenge_id
+    ).first()
+    
+    if not user_challenge:
+        return jsonify({'error': 'Challenge not joined'}), 404
+    
+    if user_challenge.is_completed:
+        return jsonify({'error': 'Challenge already completed'}), 400
+    
+    return jsonify({
+        'error': 'Progress already marked for today',
+        'already_marked': True
+    }), 400
+
+
 # ============= GET USER'S CHALLENGES =============
 @bp.route('/my-challenges', methods=['GET'])
 @jwt_required()
@@ -242,27 +367,31 @@ def get_my_challenges():
         user_id = get_jwt_identity()
         today = date.today()
         
-        user_challenges = UserChallenge.query.filter_by(user_id=user_id).all()
+        # Joined challenges with today's progress resolved in the same query
+        rows = db.session.query(UserChallenge, Challenge, ChallengeProgress.id)\
+            .join(Challenge, Challenge.id == UserChallenge.challenge_id)\
+            .outerjoin(ChallengeProgress, db.and_(
+                ChallengeProgress.user_challenge_id == UserChallenge.id,
+                ChallengeProgress.progress_date == today
+            ))\
+            .filter(UserChallenge.user_id == user_id)\
+            .all()
         
         result = []
-        for uc in user_challenges:
-            # Check if progress marked today
-            today_progress = ChallengeProgress.query.filter_by(
-                user_challenge_id=uc.id,
-                progress_date=today
-            ).first()
-            
+        for uc, challenge, today_progress_id in rows:
             result.append({
-                'id': uc.challenge.id,
-                'title': uc.challenge.title,
-                'type': uc.challenge.type,
-                'duration': uc.challenge.duration,
-                'difficulty': uc.challenge.difficulty,
-                'goal': uc.challenge.goal,
-                'description': uc.challenge.description,
+                'id': challenge.id,
+                'title': challenge.title,
+                'type': challenge.type,
+                'duration': challenge.duration,
+                'difficulty': challenge.difficulty,
+                'goal': challenge.goal,
+                'description': challenge.description,
                 'progress': uc.progress_percentage,
                 'is_completed': uc.is_completed,
-                'can_mark_today': today_progress is None and not uc.is_completed,
+                'can_mark_today': today_progress_id is None and not uc.is_completed,
+                'current_streak': streaks.effective_current(uc.current_streak, uc.last_progress_date, today),
+                'longest_streak': uc.longest_streak or 0,
                 'joined_at': uc.joined_at.isoformat(),
                 'completed_at': uc.completed_at.isoformat() if uc.completed_at else None
             })
@@ -273,6 +402,85 @@ def get_my_challenges():
         return jsonify({'error': str(e)}), 500
 
 
+# ============= GET STREAKS =============
+@bp.route('/streaks', methods=['GET'])
+@jwt_required()
+def get_streaks():
+    """Get current and longest streaks per joined challenge and overall"""
+    try:
+        user_id = get_jwt_identity()
+        today = date.today()
+        
+        rows = db.session.query(UserChallenge, Challenge.title)\
+            .join(Challenge, Challenge.id == UserChallenge.challenge_id)\
+            .filter(UserChallenge.user_id == user_id)\
+            .all()
+        
+        overall_current, overall_longest = streaks.overall(user_id, today)
+        
+        return jsonify({
+            'overall': {
+                'current_streak': overall_current,
+                'longest_streak': overall_longest
+            },
+            'challenges': [{
+                'challenge_id': uc.challenge_id,
+                'title': title,
+                'current_streak': streaks.effective_current(uc.current_streak, uc.last_progress_date, today),
+                'longest_streak': uc.longest_streak or 0,
+                'last_progress_date': uc.last_progress_date.isoformat() if uc.last_progress_date else None
+            } for uc, title in rows]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ============= ACTIVITY HEATMAP =============
+@bp.route('/heatmap', methods=['GET'])
+@jwt_required()
+def get_heatmap():
+    """Get per-day completion counts across all of the user's challenges"""
+    try:
+        user_id = get_jwt_identity()
+        
+        try:
+            to_date = date.fromisoformat(request.args['to']) if request.args.get('to') else date.today()
+            from_date = date.fromisoformat(request.args['from']) if request.args.get('from') \
+                else to_date - timedelta(days=DEFAULT_HEATMAP_DAYS - 1)
+        except ValueError:
+            return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+        
+        if from_date > to_date:
+            return jsonify({'error': 'from must not be after to'}), 400
+        if (to_date - from_date).days >= MAX_HEATMAP_DAYS:
+            return jsonify({'error': f'Range cannot exceed {MAX_HEATMAP_DAYS} days'}), 400
+        
+        # Range scan on the (user_challenge_id, progress_date) unique index per joined challenge
+        counts = db.session.query(ChallengeProgress.progress_date, db.func.count(ChallengeProgress.id))\
+            .join(UserChallenge, UserChallenge.id == ChallengeProgress.user_challenge_id)\
+            .filter(
+                UserChallenge.user_id == user_id,
+                ChallengeProgress.progress_date >= from_date,
+                ChallengeProgress.progress_date <= to_date
+            )\
+            .group_by(ChallengeProgress.progress_date)\
+            .order_by(ChallengeProgress.progress_date)\
+            .all()
+        
+        return jsonify({
+            'from': from_date.isoformat(),
+            'to': to_date.isoformat(),
+            'days': [{
+                'date': progress_date.isoformat(),
+                'count': count
+            } for progress_date, count in counts]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ============= GET CHALLENGE PROGRESS HISTORY =============
 @bp.route('/<int:challenge_id>/history', methods=['GET'])
 @jwt_required()
@@ -304,3 +512,67 @@ def get_progress_history(challenge_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+# ============= CHALLENGE LEADERBOARD =============
+@bp.route('/<int:challenge_id>/leaderboard', methods=['GET'])
+@jwt_required()
+def get_leaderboard(challenge_id):
+    """Get the top participants of a challenge"""
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        
+        challenge = Challenge.query.get(challenge_id)
+        if not challenge:
+            return jsonify({'error': 'Challenge not found'}), 404
+        
+        top, participants = leaderboards.top(challenge_id, limit)
+        
+        user_ids = [user_id for _, user_id, _ in top]
+        usernames = dict(
+            db.session.query(User.id, User.username).filter(User.id.in_(user_ids)).all()
+        ) if user_ids else {}
+        
+        return jsonify({
+            'challenge_id': challenge_id,
+            'participants': participants,
+            'leaderboard': [{
+                'rank': rank,
+                'user_id': user_id,
+                'username': usernames.get(user_id),
+                'days_completed': days_completed
+            } for rank, user_id, days_completed in top]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:challenge_id>/leaderboard/me', methods=['GET'])
+@jwt_required()
+def get_my_rank(challenge_id):
+    """Get the current user's rank in a challenge"""
+    try:
+        user_id = get_jwt_identity()
+        
+        challenge = Challenge.query.get(challenge_id)
+        if not challenge:
+            return jsonify({'error': 'Challenge not found'}), 404
+        
+        position = leaderboards.rank(challenge_id, user_id)
+        if position is None:
+            return jsonify({
+                'challenge_id': challenge_id,
+                'rank': None,
+                'days_completed': 0
+            }), 200
+        
+        rank, days_completed, participants = position
+        return jsonify({
+            'challenge_id': challenge_id,
+            'rank': rank,
+            'days_completed': days_completed,
+            'participants': participants
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,14 +1,20 @@
 # app/routes/chatbot.py - Chatbot with Gemini AI
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.chatbot_query import ChatbotQuery
-from app.services.gemini_service import GeminiService
+from app.models.chat_thread import ChatThread
+from app.services.chat_context import history_for, record_turn, reset_threads
+from app.services.gemini_service import get_gemini, GeminiUnavailableError
+from app.services.faq_index import faq_index
+from app.services.response_cache import chat_answer_cache
+from app.utils.decorators import admin_required
+from app.utils.topic_classifier import is_diet_question
 from datetime import datetime, timedelta
+import json
 
 bp = Blueprint('chatbot', __name__, url_prefix='/api/chatbot')
-gemini = GeminiService()
 
 # ============= CREATE - SEND QUERY =============
 @bp.route('/query', methods=['POST'])
@@ -19,31 +25,20 @@ def send_query():
         user_id = get_jwt_identity()
         data = request.get_json()
         
-        if not data.get('question'):
-            return jsonify({'error': 'Question is required'}), 400
-        
-        question = data['question'].strip()
-        query_type = data.get('query_type', 'diet')  # Default to diet
-        
-        # Validate query type - only diet allowed
-        if query_type != 'diet':
-            return jsonify({
-                'error': 'Only diet-related queries are supported',
-                'message': 'Please ask questions about nutrition, meal planning, or dietary advice'
-            }), 400
-        
-        # Check for diet-related keywords
-        diet_keywords = ['diet', 'food', 'meal', 'nutrition', 'calorie', 'protein', 
-                        'carb', 'fat', 'vitamin', 'eat', 'recipe', 'ingredient']
-        
-        if not any(keyword in question.lower() for keyword in diet_keywords):
-            return jsonify({
-                'error': 'Question must be diet-related',
-                'message': 'I can only answer questions about diet and nutrition'
-            }), 400
-        
-        # Generate response using Gemini
-        ai_answer = gemini.chat_response(question, context='diet')
+        question, query_type, error = _validate_diet_question(data)
+        if error:
+            return error
+        thread, error = _load_thread(user_id, data)
+        if error:
+            return error
+        history = history_for(thread) if thread else None
+        
+        # Curated FAQs and repeated questions skip the model; follow-ups depend on the conversation
+        ai_answer, source, faq_match = _stored_answer(question, history)
+        if ai_answer is None:
+            ai_answer = get_gemini().chat_response(question, context='diet', history=history)
+            if _is_fresh(history):
+                chat_answer_cache.set(question, ai_answer)
         
         # Save to database
         query = ChatbotQuery(
@@ -54,6 +49,9 @@ def send_query():
         )
         
         db.session.add(query)
+        if thread:
+            db.session.flush()
+            record_turn(thread, query)
         db.session.commit()
         
         return jsonify({
@@ -61,9 +59,253 @@ def send_query():
             'question': query.question,
             'answer': query.answer,
             'query_type': query.query_type,
+            'thread_id': query.thread_id,
+            **_source_fields(source, faq_match),
             'created_at': query.created_at.isoformat()
         }), 201
         
+    except GeminiUnavailableError as e:
+        db.session.rollback()
+        return jsonify({'error': 'AI service temporarily unavailable', 'details': str(e)}), 503
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _validate_diet_question(data):
+    """Return (question, query_type, error_response) for a chatbot request body"""
+    if not data or not data.get('question'):
+        return None, None, (jsonify({'error': 'Question is required'}), 400)
+    
+    question = data['question'].strip()
+    query_type = data.get('query_type', 'diet')  # Default to diet
+    
+    # Validate query type - only diet allowed
+    if query_type != 'diet':
+        return None, None, (jsonify({
+            'error': 'Only diet-related queries are supported',
+            'message': 'Please ask questions about nutrition, meal planning, or dietary advice'
+        }), 400)
+    
+    # Check the question against the diet vocabulary
+    if not is_diet_question(question):
+        return None, None, (jsonify({
+            'error': 'Question must be diet-related',
+            'message': 'I can only answer questions about diet and nutrition'
+        }), 400)
+    
+    return question, query_type, None
+
+
+def _load_thread(user_id, data):
+    """Return (thread, error_response) for an optional thread_id in a chatbot request body"""
+    thread_id = (data or {}).get('thread_id')
+    if thread_id is None:
+        return None, None
+    thread = ChatThread.query.filter_by(id=thread_id, user_id=user_id).first()
+    if not thread:
+        return None, (jsonify({'error': 'Thread not found'}), 404)
+    return thread, None
+
+
+def _is_fresh(history):
+    """True when there is no earlier conversation the answer could depend on"""
+    return not history or not (history['summary'] or history['turns'])
+
+
+def _stored_answer(question, history=None):
+    """Return (answer, source, faq_match) from the curated FAQ or the answer cache, or Nones"""
+    if not _is_fresh(history):
+        return None, None, None
+    faq_match = faq_index.match(question)
+    if faq_match is not None:
+        return faq_match[1], 'faq', faq_match
+    answer = chat_answer_cache.get(question)
+    if answer is not None:
+        return answer, 'cache', None
+    return None, None, None
+
+
+def _source_fields(source, faq_match):
+    """Where an answer came from, with the FAQ entry and its similarity when it was retrieved"""
+    return {
+        'source': source or 'model',
+        'cached': source == 'cache',
+        'confidence': round(faq_match[2], 3) if faq_match else None,
+        'source_id': faq_match[0] if faq_match else None
+    }
+
+
+def _sse(payload, event=None):
+    """Format one server-sent event"""
+    message = f"data: {json.dumps(payload)}\n\n"
+    return f"event: {event}\n{message}" if event else message
+
+
+# ============= CREATE - STREAM QUERY =============
+@bp.route('/query/stream', methods=['POST'])
+@jwt_required()
+def stream_query():
+    """Send question to chatbot and stream the AI response as server-sent events"""
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    question, query_type, error = _validate_diet_question(data)
+    if error:
+        return error
+    thread, error = _load_thread(user_id, data)
+    if error:
+        return error
+    history = history_for(thread) if thread else None
+    
+    def events():
+        parts = []
+        try:
+            cached_answer, source, faq_match = _stored_answer(question, history)
+            if cached_answer is not None:
+                parts.append(cached_answer)
+                yield _sse({'delta': cached_answer})
+            else:
+                for chunk in get_gemini().stream_chat_response(question, history=history):
+                    parts.append(chunk)
+                    yield _sse({'delta': chunk})
+            
+            # Persist the assembled answer once the stream is complete
+            answer = ''.join(parts)
+            if cached_answer is None and _is_fresh(history):
+                chat_answer_cache.set(question, answer)
+            
+            query = ChatbotQuery(
+                user_id=user_id,
+                question=question,
+                answer=answer,
+                query_type=query_type
+            )
+            db.session.add(query)
+            if thread:
+                db.session.flush()
+                record_turn(thread, query)
+            db.session.commit()
+            
+            yield _sse({
+                'id': query.id,
+                'query_type': query.query_type,
+                'thread_id': query.thread_id,
+                **_source_fields(source, faq_match),
+                'created_at': query.created_at.isoformat()
+            }, event='done')
+            
+        except Exception as e:
+            db.session.rollback()
+            yield _sse({'error': str(e)}, event='error')
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+# ============= THREADS =============
+def _thread_json(thread):
+    return {
+        'id': thread.id,
+        'title': thread.title,
+        'turn_count': thread.turn_count,
+        'summary': thread.summary,
+        'created_at': thread.created_at.isoformat(),
+        'updated_at': thread.updated_at.isoformat()
+    }
+
+
+@bp.route('/threads', methods=['POST'])
+@jwt_required()
+def create_thread():
+    """Start a conversation thread; pass its id as thread_id with follow-up questions"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        
+        thread = ChatThread(user_id=user_id, title=(data.get('title') or '').strip()[:200] or None)
+        db.session.add(thread)
+        db.session.commit()
+        
+        return jsonify(_thread_json(thread)), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/threads', methods=['GET'])
+@jwt_required()
+def get_threads():
+    """List the user's conversation threads, most recently active first"""
+    try:
+        user_id = get_jwt_identity()
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        
+        threads = ChatThread.query.filter_by(user_id=user_id)\
+            .order_by(ChatThread.updated_at.desc())\
+            .paginate(page=page, per_page=per_page, error_out=False)
+        
+        return jsonify({
+            'threads': [_thread_json(thread) for thread in threads.items],
+            'total': threads.total,
+            'page': threads.page,
+            'pages': threads.pages
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/threads/<int:thread_id>', methods=['GET'])
+@jwt_required()
+def get_thread(thread_id):
+    """Get a thread with its turns, oldest first"""
+    try:
+        user_id = get_jwt_identity()
+        
+        thread = ChatThread.query.filter_by(id=thread_id, user_id=user_id).first()
+        if not thread:
+            return jsonify({'error': 'Thread not found'}), 404
+        
+        turns = ChatbotQuery.query.filter_by(thread_id=thread.id).order_by(ChatbotQuery.id).all()
+        
+        return jsonify({
+            **_thread_json(thread),
+            'turns': [{
+                'id': q.id,
+                'question': q.question,
+                'answer': q.answer,
+                'created_at': q.created_at.isoformat()
+            } for q in turns]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/threads/<int:thread_id>', methods=['DELETE'])
+@jwt_required()
+def delete_thread(thread_id):
+    """Delete a thread and its turns"""
+    try:
+        user_id = get_jwt_identity()
+        
+        thread = ChatThread.query.filter_by(id=thread_id, user_id=user_id).first()
+        if not thread:
+            return jsonify({'error': 'Thread not found'}), 404
+        
+        # Curated FAQ answers are served to everyone, so they outlive the thread instead of cascading
+        ChatbotQuery.query.filter_by(thread_id=thread.id, is_faq=True).update({'thread_id': None})
+        ChatbotQuery.query.filter_by(thread_id=thread.id).delete()
+        db.session.delete(thread)
+        db.session.commit()
+        
+        return jsonify({'message': 'Thread deleted successfully'}), 200
+        
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -138,6 +380,41 @@ def get_query(id):
         return jsonify({'error': str(e)}), 500
 
 
+# ============= UPDATE - CURATE FAQ =============
+@bp.route('/<int:id>/faq', methods=['POST'])
+@admin_required
+def set_faq(id):
+    """Mark or unmark a stored answer as a curated FAQ (Admin only)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        query = ChatbotQuery.query.get(id)
+        if not query:
+            return jsonify({'error': 'Query not found'}), 404
+        if not query.answer:
+            return jsonify({'error': 'Only answered queries can be FAQs'}), 400
+        
+        query.is_faq = bool(data.get('is_faq', True))
+        query.faq_updated_at = datetime.utcnow()
+        db.session.commit()
+        
+        # Other processes pick the change up on their next sync
+        if query.is_faq:
+            faq_index.add(query.id, query.question, query.answer)
+        else:
+            faq_index.remove(query.id)
+        
+        return jsonify({
+            'id': query.id,
+            'is_faq': query.is_faq,
+            'faq_updated_at': query.faq_updated_at.isoformat()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 # ============= DELETE - DELETE QUERY =============
 @bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
@@ -150,8 +427,14 @@ def delete_query(id):
         
         if not query:
             return jsonify({'error': 'Query not found'}), 404
+        # A deleted row leaves no trail for other processes' FAQ indexes; un-curating does
+        if query.is_faq:
+            return jsonify({'error': 'This answer is a curated FAQ; an admin must un-curate it first'}), 409
         
+        thread_id = query.thread_id
         db.session.delete(query)
+        if thread_id:
+            reset_threads([thread_id])
         db.session.commit()
         
         return jsonify({'message': 'Query deleted successfully'}), 200
@@ -172,10 +455,19 @@ def clear_history():
         # Optional: only clear specific query type
         query_type = request.args.get('query_type')
         
+        # Curated FAQ answers are served to everyone; they stay until an admin un-curates them
+        cleared = ChatbotQuery.query.filter_by(user_id=user_id, is_faq=False)
         if query_type:
-            ChatbotQuery.query.filter_by(user_id=user_id, query_type=query_type).delete()
-        else:
-            ChatbotQuery.query.filter_by(user_id=user_id).delete()
+            cleared = cleared.filter_by(query_type=query_type)
+        
+        thread_ids = [
+            thread_id for thread_id, in cleared.with_entities(ChatbotQuery.thread_id)
+            .filter(ChatbotQuery.thread_id.isnot(None))
+            .distinct()
+        ]
+        cleared.delete(synchronize_session=False)
+        if thread_ids:
+            reset_threads(thread_ids)
         
         db.session.commit()
         
@@ -239,14 +531,20 @@ def quick_ask():
         
         question = data['question'].strip()
         
-        # Generate response
-        answer = gemini.chat_response(question, context='diet')
+        # Generate response, reusing curated FAQs and cached answers to repeated questions
+        answer, source, faq_match = _stored_answer(question)
+        if answer is None:
+            answer = get_gemini().chat_response(question, context='diet')
+            chat_answer_cache.set(question, answer)
         
         return jsonify({
             'question': question,
             'answer': answer,
+            **_source_fields(source, faq_match),
             'saved': False
         }), 200
         
+    except GeminiUnavailableError as e:
+        return jsonify({'error': 'AI service temporarily unavailable', 'details': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
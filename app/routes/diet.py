@@ -1,13 +1,18 @@
 # app/routes/diet.py - Complete CRUD Example
 
+import math
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.diet_plan import DietPlan
-from app.services.gemini_service import GeminiService
+from app.models.ai_response_cache import AIResponseCache
+from app.services import job_service
+from app.services.gemini_service import router
+from app.services.response_cache import DietPlanCache, diet_plan_cache
+from app.utils.decorators import admin_required
+from app.utils.diet_plan_schema import DietPlanFormatError, normalize_diet_plan, totals_columns
 
 bp = Blueprint('diet', __name__, url_prefix='/api/diet')
-gemini = GeminiService()
 
 # ============= CREATE =============
 @bp.route('/generate', methods=['POST'])
@@ -24,33 +29,28 @@ def generate_diet_plan():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        # Generate diet plan using Gemini
-        ai_response = gemini.generate_diet_plan(data)
-        
-        # Create diet plan object
-        diet_plan = DietPlan(
-            user_id=user_id,
-            diet_plan={
-                'user_info': data,
-                'meal_plan': ai_response,
-                'generated_by': 'gemini-ai'
-            },
-            goal=data.get('goal'),
-            diet_type=data.get('diet_type'),
-            duration=data.get('duration', '1_month')
-        )
-        
-        db.session.add(diet_plan)
+        # Never queue work the model is certain to refuse: serve a cached plan or ask to retry later
+        retry_in = router.unavailable_for(structured=True)
+        if retry_in is not None:
+            ai_response, cache_hit = diet_plan_cache.lookup(data)
+            if ai_response is None:
+                response = jsonify({'error': 'AI service temporarily unavailable'})
+                response.headers['Retry-After'] = str(max(1, math.ceil(retry_in)))
+                return response, 503
+            result = job_service.store_diet_plan(user_id, data, ai_response, cache_hit)
+            db.session.commit()
+            return jsonify({'message': 'Diet plan served from cache', **result}), 201
+        
+        # Hand the Gemini call to the generation worker
+        job = job_service.enqueue(user_id, 'diet_plan', data)
         db.session.commit()
         
         return jsonify({
-            'message': 'Diet plan generated successfully',
-            'diet_plan': {
-                'id': diet_plan.id,
-                'plan': diet_plan.diet_plan,
-                'created_at': diet_plan.created_at.isoformat()
-            }
-        }), 201
+            'message': 'Diet plan generation queued',
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/api/jobs/{job.id}'
+        }), 202
         
     except Exception as e:
         db.session.rollback()
@@ -68,20 +68,32 @@ def get_user_diet_plans():
         # Pagination
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
-        
-        diet_plans = DietPlan.query.filter_by(user_id=user_id)\
-            .order_by(DietPlan.created_at.desc())\
+        # Full plans are large; lists return the macro summary unless asked otherwise
+        include_plan = request.args.get('include_plan', 'false').lower() == 'true'
+        
+        query = DietPlan.query.filter_by(user_id=user_id)
+        if not include_plan:
+            # The summary comes from the macro columns, so the plan JSON is never loaded
+            query = query.options(db.defer(DietPlan.diet_plan))
+        diet_plans = query.order_by(DietPlan.created_at.desc())\
             .paginate(page=page, per_page=per_page, error_out=False)
         
-        return jsonify({
-            'diet_plans': [{
+        results = []
+        for plan in diet_plans.items:
+            item = {
                 'id': plan.id,
                 'goal': plan.goal,
                 'diet_type': plan.diet_type,
                 'duration': plan.duration,
                 'created_at': plan.created_at.isoformat(),
-                'plan': plan.diet_plan
-            } for plan in diet_plans.items],
+                'summary': _summary(plan)
+            }
+            if include_plan:
+                item['plan'] = plan.diet_plan
+            results.append(item)
+        
+        return jsonify({
+            'diet_plans': results,
             'total': diet_plans.total,
             'page': diet_plans.page,
             'pages': diet_plans.pages
@@ -91,6 +103,18 @@ def get_user_diet_plans():
         return jsonify({'error': str(e)}), 500
 
 
+def _summary(plan):
+    """Daily totals from the macro columns; None for legacy free-text plans"""
+    if plan.total_calories is None:
+        return None
+    return {
+        'calories': plan.total_calories,
+        'protein_g': plan.protein_g,
+        'carbs_g': plan.carbs_g,
+        'fat_g': plan.fat_g
+    }
+
+
 # ============= READ (ONE) =============
 @bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
@@ -139,7 +163,19 @@ def update_diet_plan(id):
         if 'duration' in data:
             diet_plan.duration = data['duration']
         if 'diet_plan' in data:
-            diet_plan.diet_plan = data['diet_plan']
+            # Only the meal plan is editable; user_info and generated_by keep their generated values.
+            # It is held to the generated schema so the macro columns stay in step.
+            body = data['diet_plan']
+            if not isinstance(body, dict):
+                return jsonify({'error': 'diet_plan must be an object'}), 400
+            try:
+                meal_plan = normalize_diet_plan(body.get('meal_plan'))
+            except DietPlanFormatError as e:
+                return jsonify({'error': f'Invalid meal_plan: {e}'}), 400
+            existing = diet_plan.diet_plan if isinstance(diet_plan.diet_plan, dict) else {}
+            diet_plan.diet_plan = {**existing, 'meal_plan': meal_plan}
+            for column, value in totals_columns(meal_plan).items():
+                setattr(diet_plan, column, value)
         
         db.session.commit()
         
@@ -228,6 +264,27 @@ def get_latest_diet():
             'created_at': latest_diet.created_at.isoformat()
         }
     }), 200
+@bp.route('/cache/stats', methods=['GET'])
+@admin_required
+def get_diet_cache_stats():
+    """Get diet plan response cache usage (Admin only)"""
+    try:
+        entries, total_hits = db.session.query(
+            db.func.count(AIResponseCache.cache_key),
+            db.func.coalesce(db.func.sum(AIResponseCache.hit_count), 0)
+        ).filter(AIResponseCache.namespace == DietPlanCache.NAMESPACE).one()
+        
+        return jsonify({
+            'entries': entries,
+            'total_hits': int(total_hits),
+            'max_entries': diet_plan_cache.max_rows,
+            'ttl_hours': diet_plan_cache.ttl.total_seconds() / 3600
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/statistics', methods=['GET'])
 @jwt_required()
 def get_diet_statistics():
@@ -0,0 +1,34 @@
+# app/routes/jobs.py - Status of queued AI generation jobs
+
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.generation_job import GenerationJob
+
+bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+# ============= READ - JOB STATUS =============
+@bp.route('/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Get status and, once finished, the result of a generation job"""
+    try:
+        user_id = get_jwt_identity()
+        
+        job = GenerationJob.query.filter_by(id=job_id, user_id=user_id).first()
+        
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify({
+            'id': job.id,
+            'kind': job.kind,
+            'status': job.status,
+            'result': job.result,
+            'error': job.error,
+            'created_at': job.created_at.isoformat(),
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
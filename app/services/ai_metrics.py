@@ -0,0 +1,236 @@
+import os
+import socket
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float('inf'))
+
+# Rough English average used when the SDK does not report token usage
+CHARS_PER_TOKEN = 4
+
+# Snapshots from other processes older than this are left out of the merged view
+SNAPSHOT_STALE_SECONDS = int(os.getenv('AI_METRICS_STALE_SECONDS', 300))
+# Rows of processes gone this long are deleted on the next publish
+SNAPSHOT_RETENTION = timedelta(days=1)
+
+
+def estimate_tokens(text):
+    return (len(text or '') + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def state(self):
+        return {'counts': list(self.counts), 'total_ms': self.total_ms, 'max_ms': self.max_ms}
+
+    def absorb(self, state):
+        """Add another histogram's state() with the same buckets"""
+        for index, count in enumerate(state['counts'][:len(self.counts)]):
+            self.counts[index] += count
+        self.total_ms += state['total_ms']
+        self.max_ms = max(self.max_ms, state['max_ms'])
+
+    def percentile(self, pct):
+        observed = sum(self.counts)
+        if not observed:
+            return None
+        threshold = pct / 100.0 * observed
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= threshold:
+                return self.max_ms if bound == float('inf') else bound
+        return self.max_ms
+
+    def snapshot(self):
+        observed = sum(self.counts)
+        return {
+            'count': observed,
+            'mean_ms': round(self.total_ms / observed, 1) if observed else None,
+            'max_ms': round(self.max_ms, 1),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': {
+                ('+Inf' if bound == float('inf') else f'le_{bound}'): count
+                for bound, count in zip(self.buckets, self.counts)
+            }
+        }
+
+
+class _MethodStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.first_chunk = None
+        self.calls = 0
+        self.errors = {}
+        self.counters = {}
+        self.prompt_chars = 0
+        self.response_chars = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+
+
+class AIMetrics:
+    """Per-method counters for GeminiService calls.
+
+    Kept in process memory like the breaker state. Processes that serve no
+    HTTP (the generation worker) publish export() to ai_metrics_snapshots,
+    and /health/ai absorbs those rows into its own view.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods = {}
+
+    def _stats(self, method):
+        stats = self._methods.get(method)
+        if stats is None:
+            stats = self._methods[method] = _MethodStats()
+        return stats
+
+    def observe(self, method, seconds, prompt='', response='', error=None):
+        """Record one upstream call: latency, payload sizes and the error type if it failed"""
+        with self._lock:
+            stats = self._stats(method)
+            stats.calls += 1
+            stats.latency.observe(seconds * 1000)
+            stats.prompt_chars += len(prompt or '')
+            stats.response_chars += len(response or '')
+            stats.prompt_tokens += estimate_tokens(prompt)
+            stats.response_tokens += estimate_tokens(response)
+            if error is not None:
+                name = type(error).__name__
+                stats.errors[name] = stats.errors.get(name, 0) + 1
+
+    def observe_first_chunk(self, method, seconds):
+        """Record time to first streamed chunk, which is what users perceive as latency"""
+        with self._lock:
+            stats = self._stats(method)
+            if stats.first_chunk is None:
+                stats.first_chunk = LatencyHistogram()
+            stats.first_chunk.observe(seconds * 1000)
+
+    def increment(self, method, counter, amount=1):
+        """Count a named event such as a fallback, retry or cache hit"""
+        with self._lock:
+            stats = self._stats(method)
+            stats.counters[counter] = stats.counters.get(counter, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            methods = {}
+            for method, stats in self._methods.items():
+                calls = stats.calls
+                methods[method] = {
+                    'calls': calls,
+                    'errors': dict(stats.errors),
+                    'error_count': sum(stats.errors.values()),
+                    'latency': stats.latency.snapshot(),
+                    'prompt_chars': stats.prompt_chars,
+                    'response_chars': stats.response_chars,
+                    'avg_prompt_chars': round(stats.prompt_chars / calls) if calls else None,
+                    'avg_response_chars': round(stats.response_chars / calls) if calls else None,
+                    'estimated_prompt_tokens': stats.prompt_tokens,
+                    'estimated_response_tokens': stats.response_tokens,
+                    **dict(stats.counters)
+                }
+                if stats.first_chunk is not None:
+                    methods[method]['first_chunk_latency'] = stats.first_chunk.snapshot()
+        return methods
+
+    def export(self):
+        """Raw, JSON-serializable state that another process can absorb()"""
+        with self._lock:
+            return {
+                method: {
+                    'latency': stats.latency.state(),
+                    'first_chunk': stats.first_chunk.state() if stats.first_chunk is not None else None,
+                    'calls': stats.calls,
+                    'errors': dict(stats.errors),
+                    'counters': dict(stats.counters),
+                    'prompt_chars': stats.prompt_chars,
+                    'response_chars': stats.response_chars,
+                    'prompt_tokens': stats.prompt_tokens,
+                    'response_tokens': stats.response_tokens
+                }
+                for method, stats in self._methods.items()
+            }
+
+    def absorb(self, exported):
+        """Add another process's export() into these counters"""
+        with self._lock:
+            for method, other in exported.items():
+                stats = self._stats(method)
+                stats.latency.absorb(other['latency'])
+                if other.get('first_chunk'):
+                    if stats.first_chunk is None:
+                        stats.first_chunk = LatencyHistogram()
+                    stats.first_chunk.absorb(other['first_chunk'])
+                stats.calls += other['calls']
+                for name, count in other['errors'].items():
+                    stats.errors[name] = stats.errors.get(name, 0) + count
+                for name, count in other['counters'].items():
+                    stats.counters[name] = stats.counters.get(name, 0) + count
+                for field in ('prompt_chars', 'response_chars', 'prompt_tokens', 'response_tokens'):
+                    setattr(stats, field, getattr(stats, field) + other[field])
+
+    def reset(self):
+        with self._lock:
+            self._methods = {}
+
+
+metrics = AIMetrics()
+
+
+def process_key(role):
+    return f"{role}:{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+def publish(role, caches=None):
+    """Upsert this process's metrics snapshot and commit"""
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from app import db
+    from app.models.ai_metrics_snapshot import AIMetricsSnapshot
+
+    now = datetime.utcnow()
+    exported = metrics.export()
+    db.session.execute(
+        pg_insert(AIMetricsSnapshot).values(
+            process_key=process_key(role),
+            role=role,
+            metrics=exported,
+            caches=caches,
+            updated_at=now
+        ).on_conflict_do_update(
+            index_elements=['process_key'],
+            set_={'metrics': exported, 'caches': caches, 'updated_at': now}
+        )
+    )
+    AIMetricsSnapshot.query.filter(AIMetricsSnapshot.updated_at < now - SNAPSHOT_RETENTION)\
+        .delete(synchronize_session=False)
+    db.session.commit()
+
+
+def published_snapshots(now=None):
+    """Recent snapshots published by other processes"""
+    from app.models.ai_metrics_snapshot import AIMetricsSnapshot
+
+    now = now or datetime.utcnow()
+    return AIMetricsSnapshot.query.filter(
+        AIMetricsSnapshot.updated_at >= now - timedelta(seconds=SNAPSHOT_STALE_SECONDS)
+    ).all()
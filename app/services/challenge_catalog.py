@@ -0,0 +1,143 @@
+import base64
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.models.challenge import Challenge
+
+FILTER_FIELDS = ('type', 'difficulty', 'goal', 'is_ai_generated')
+# Upper bound on how long a page may miss updates and deletes made by other processes
+PAGE_TTL_SECONDS = float(os.getenv('CHALLENGE_CATALOG_TTL_SECONDS', 60))
+
+
+def encode_cursor(created_at, challenge_id):
+    raw = f"{created_at.isoformat()}|{challenge_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from an opaque cursor, raising ValueError if malformed"""
+    try:
+        created_at, challenge_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(challenge_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+class ChallengeCatalog:
+    """Process-level cache of serialized challenge catalogue pages.
+
+    Every row is global, so pages are keyed only by filters, cursor and
+    limit and shared by all users in a bounded LRU; per-user join state is
+    overlaid by the caller. The whole cache is dropped whenever a session in
+    this process that touched a Challenge commits. Rows inserted by other processes (the
+    generation worker, other server workers) are noticed by probing
+    max(id) on every read; pages also expire after PAGE_TTL_SECONDS so
+    remote updates and deletes surface eventually.
+    """
+
+    def __init__(self, max_pages=256, ttl_seconds=PAGE_TTL_SECONDS):
+        self.max_pages = max_pages
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._pages = OrderedDict()
+        self._generation = 0
+        self._latest_id = None
+
+    def get_page(self, filters=None, cursor=None, limit=50):
+        """Return (rows, next_cursor) for one keyset page, newest first"""
+        filters = {key: value for key, value in (filters or {}).items() if key in FILTER_FIELDS and value is not None}
+        key = (tuple(sorted(filters.items())), cursor, limit)
+
+        # One primary-key index lookup; a new max means another process inserted challenges
+        latest_id = db.session.query(db.func.max(Challenge.id)).scalar()
+        now = time.monotonic()
+        with self._lock:
+            if latest_id != self._latest_id:
+                self._latest_id = latest_id
+                self._generation += 1
+                self._pages.clear()
+            cached = self._pages.get(key)
+            if cached is not None and now - cached[1] < self.ttl_seconds:
+                self._pages.move_to_end(key)
+                return cached[0]
+            generation = self._generation
+
+        page = self._load_page(filters, cursor, limit)
+
+        with self._lock:
+            # Only publish if nothing was invalidated while we were loading
+            if generation == self._generation:
+                self._pages[key] = (page, now)
+                self._pages.move_to_end(key)
+                if len(self._pages) > self.max_pages:
+                    self._pages.popitem(last=False)
+        return page
+
+    def invalidate(self):
+        """Drop every cached page"""
+        with self._lock:
+            self._generation += 1
+            self._pages.clear()
+
+    def invalidate_on_commit(self):
+        """Drop the cache once the current session commits (for Core inserts that skip ORM events)"""
+        db.session.info[_SESSION_FLAG] = True
+
+    def _load_page(self, filters, cursor, limit):
+        query = Challenge.query.filter_by(**filters)
+        if cursor:
+            created_at, challenge_id = decode_cursor(cursor)
+            query = query.filter(db.tuple_(Challenge.created_at, Challenge.id) < (created_at, challenge_id))
+
+        # Fetch one extra row to learn whether another page exists
+        challenges = query.order_by(Challenge.created_at.desc(), Challenge.id.desc()).limit(limit + 1).all()
+        has_more = len(challenges) > limit
+        challenges = challenges[:limit]
+
+        next_cursor = encode_cursor(challenges[-1].created_at, challenges[-1].id) if has_more else None
+        return [self.serialize(challenge) for challenge in challenges], next_cursor
+
+    @staticmethod
+    def serialize(challenge):
+        return {
+            'id': challenge.id,
+            'title': challenge.title,
+            'type': challenge.type,
+            'duration': challenge.duration,
+            'difficulty': challenge.difficulty,
+            'goal': challenge.goal,
+            'description': challenge.description,
+            'is_ai_generated': challenge.is_ai_generated,
+            'created_at': challenge.created_at.isoformat()
+        }
+
+
+catalog = ChallengeCatalog()
+
+_SESSION_FLAG = 'challenge_catalog_dirty'
+
+
+def _mark_session_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_SESSION_FLAG] = True
+
+
+def _invalidate_after_commit(session):
+    if session.info.pop(_SESSION_FLAG, False):
+        catalog.invalidate()
+
+
+def _clear_after_rollback(session):
+    session.info.pop(_SESSION_FLAG, None)
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Challenge, _event_name, _mark_session_dirty)
+event.listen(Session, 'after_commit', _invalidate_after_commit)
+event.listen(Session, 'after_rollback', _clear_after_rollback)
@@ -0,0 +1,126 @@
+import itertools
+import os
+from datetime import datetime, timedelta
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app import db
+from app.models.challenge_pool import ChallengePool
+from app.services.challenge_service import is_default_suggestions
+
+# Pools older than this are regenerated on the next miss or batch run
+POOL_TTL = timedelta(hours=int(os.getenv('CHALLENGE_POOL_TTL_HOURS', 24 * 7)))
+
+GOALS = ('weight loss', 'weight gain', 'strength', 'core strength', 'maintain fitness', 'trauma recovery')
+ACTIVITY_LEVELS = ('sedentary', 'light', 'moderate', 'active', 'very active')
+
+# (lower, upper inclusive, label); the representative age sent to the model is the midpoint
+AGE_BANDS = (
+    (0, 17, 'under_18'),
+    (18, 24, '18-24'),
+    (25, 34, '25-34'),
+    (35, 44, '35-44'),
+    (45, 54, '45-54'),
+    (55, 64, '55-64'),
+    (65, 120, '65+')
+)
+UNKNOWN = 'unknown'
+
+
+def _choice(value, choices):
+    """Map free text onto a known value, so the number of cohorts stays fixed"""
+    text = ' '.join(str(value or '').replace('_', ' ').replace('-', ' ').casefold().split())
+    return text if text in choices else UNKNOWN
+
+
+def age_band(age):
+    try:
+        age = int(float(age))
+    except (TypeError, ValueError):
+        return UNKNOWN
+    for lower, upper, label in AGE_BANDS:
+        if lower <= age <= upper:
+            return label
+    return UNKNOWN
+
+
+def cohort_for(user_data):
+    """The coarse bucket a request falls into; other profile fields are ignored"""
+    return {
+        'goal': _choice(user_data.get('goal'), GOALS),
+        'activity_level': _choice(user_data.get('activity_level'), ACTIVITY_LEVELS),
+        'age_band': age_band(user_data.get('age'))
+    }
+
+
+def cohort_key(cohort):
+    return f"{cohort['goal']}|{cohort['activity_level']}|{cohort['age_band']}"
+
+
+def cohort_profile(cohort):
+    """Representative profile sent to the model so one answer serves the whole cohort"""
+    age = 'Not provided'
+    for lower, upper, label in AGE_BANDS:
+        if label == cohort['age_band']:
+            age = (lower + upper) // 2
+    return {
+        'age': age,
+        'activity_level': 'Not provided' if cohort['activity_level'] == UNKNOWN else cohort['activity_level'],
+        'goal': 'Not provided' if cohort['goal'] == UNKNOWN else cohort['goal']
+    }
+
+
+def all_cohorts():
+    """Every cohort the batch job precomputes"""
+    for goal, activity_level, (_, _, band) in itertools.product(GOALS, ACTIVITY_LEVELS, AGE_BANDS):
+        yield {'goal': goal, 'activity_level': activity_level, 'age_band': band}
+
+
+def fresh_pool(cohort, now=None):
+    """Stored suggestions for a cohort, or None if the pool is missing or stale"""
+    now = now or datetime.utcnow()
+    pool = ChallengePool.query.filter(
+        ChallengePool.cohort_key == cohort_key(cohort),
+        ChallengePool.generated_at >= now - POOL_TTL
+    ).first()
+    return pool.suggestions if pool is not None else None
+
+
+def stored_pool(cohort):
+    """Stored suggestions for a cohort whatever their age, or None; for when the model is unavailable"""
+    pool = ChallengePool.query.filter(ChallengePool.cohort_key == cohort_key(cohort)).first()
+    return pool.suggestions if pool is not None else None
+
+
+def stale_cohorts(cohorts, now=None):
+    """The subset of cohorts whose pool is missing or stale, in one query"""
+    now = now or datetime.utcnow()
+    cohorts = list(cohorts)
+    fresh = {
+        row[0] for row in db.session.query(ChallengePool.cohort_key).filter(
+            ChallengePool.cohort_key.in_([cohort_key(cohort) for cohort in cohorts]),
+            ChallengePool.generated_at >= now - POOL_TTL
+        )
+    }
+    return [cohort for cohort in cohorts if cohort_key(cohort) not in fresh]
+
+
+def store_pool(cohort, suggestions, now=None):
+    """Upsert a cohort's suggestions; the caller commits.
+
+    The static fallback set is never stored, so a cohort whose generation
+    failed stays missing and is retried on the next miss.
+    """
+    if not suggestions or is_default_suggestions(suggestions):
+        return False
+    now = now or datetime.utcnow()
+    db.session.execute(
+        pg_insert(ChallengePool).values(
+            cohort_key=cohort_key(cohort),
+            generated_at=now,
+            suggestions=suggestions,
+            **cohort
+        ).on_conflict_do_update(
+            index_elements=['cohort_key'],
+            set_={'suggestions': suggestions, 'generated_at': now}
+        )
+    )
+    return True
@@ -0,0 +1,88 @@
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app import db
+from app.models.challenge import Challenge, ChallengeSuggestion
+from app.services.challenge_catalog import catalog
+from app.services.gemini_service import DEFAULT_CHALLENGES
+from datetime import datetime
+
+def _fingerprint(challenge_data):
+    return Challenge.compute_fingerprint(
+        challenge_data.get('title'),
+        challenge_data.get('type'),
+        challenge_data.get('duration'),
+        challenge_data.get('difficulty'),
+        challenge_data.get('goal')
+    )
+
+
+DEFAULT_FINGERPRINTS = {_fingerprint(challenge) for challenge in DEFAULT_CHALLENGES}
+
+
+def is_default_suggestions(suggestions):
+    """True if the suggestions are just the static fallback set"""
+    return all(_fingerprint(challenge) in DEFAULT_FINGERPRINTS for challenge in suggestions)
+
+
+def save_generated_challenges(user_id, suggestions):
+    """Store AI suggestions once globally and link them to the user they were generated for.
+
+    Rows whose content already exists are reused, whoever first asked for
+    them, so the catalogue grows with distinct content rather than with
+    requests. Returns the serialized rows in suggestion order. The caller commits.
+    """
+    now = datetime.utcnow()
+    rows = {}
+    for challenge_data in suggestions:
+        if not challenge_data.get('title'):
+            continue
+        fingerprint = _fingerprint(challenge_data)
+        if fingerprint in rows:
+            continue
+        rows[fingerprint] = {
+            'title': challenge_data.get('title'),
+            'type': challenge_data.get('type'),
+            'duration': challenge_data.get('duration'),
+            'duration_days': Challenge.parse_duration_days(challenge_data.get('duration')),
+            'difficulty': challenge_data.get('difficulty'),
+            'goal': challenge_data.get('goal'),
+            'description': challenge_data.get('description', ''),
+            'is_ai_generated': True,
+            'fingerprint': fingerprint,
+            'created_at': now
+        }
+
+    if not rows:
+        return []
+
+    # One multi-row insert; repeats hit the unique fingerprint index and are skipped
+    inserted_ids = db.session.execute(
+        pg_insert(Challenge).values(list(rows.values()))
+        .on_conflict_do_nothing()
+        .returning(Challenge.id)
+    ).scalars().all()
+    if inserted_ids:
+        catalog.invalidate_on_commit()
+
+    by_fingerprint = {
+        challenge.fingerprint: challenge
+        for challenge in Challenge.query.filter(Challenge.fingerprint.in_(list(rows))).all()
+    }
+    stored = [by_fingerprint[fingerprint] for fingerprint in rows if fingerprint in by_fingerprint]
+
+    # Fallback content is not generated for anyone, so it gets no suggestion link
+    linked = [challenge.id for challenge in stored if challenge.fingerprint not in DEFAULT_FINGERPRINTS]
+    if linked:
+        insert = pg_insert(ChallengeSuggestion).values([
+            {'user_id': int(user_id), 'challenge_id': challenge_id, 'suggested_at': now}
+            for challenge_id in linked
+        ])
+        db.session.execute(insert.on_conflict_do_update(
+            index_elements=['user_id', 'challenge_id'],
+            set_={'suggested_at': insert.excluded.suggested_at}
+        ))
+
+    inserted_ids = set(inserted_ids)
+    return [{
+        **catalog.serialize(challenge),
+        'reused': challenge.id not in inserted_ids
+    } for challenge in stored]
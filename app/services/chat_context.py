@@ -0,0 +1,118 @@
+import os
+from datetime import datetime
+from app import db
+from app.models.chat_thread import ChatThread
+from app.models.chatbot_query import ChatbotQuery
+
+# Turns sent verbatim with each question; older ones only reach the model through the summary
+RECENT_TURNS = int(os.getenv('CHAT_CONTEXT_TURNS', 4))
+# Older turns are folded into the summary this many at a time, so summarizing costs one call per batch
+SUMMARY_BATCH = int(os.getenv('CHAT_SUMMARY_BATCH', 4))
+MAX_TURN_CHARS = int(os.getenv('CHAT_CONTEXT_TURN_CHARS', 600))
+MAX_SUMMARY_CHARS = int(os.getenv('CHAT_SUMMARY_CHARS', 1200))
+
+
+def clip(text, limit):
+    text = ' '.join((text or '').split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+
+def history_for(thread):
+    """Bounded context for the next question: the stored summary plus every turn after it.
+
+    Turns already folded into the summary are never resent, and each turn is
+    clipped, so the prompt size does not grow with the conversation. Turns
+    that left the recent window but wait for the next summary batch are still
+    sent, up to one batch beyond the window.
+    """
+    turns = ChatbotQuery.query.with_entities(ChatbotQuery.question, ChatbotQuery.answer)\
+        .filter(ChatbotQuery.thread_id == thread.id, ChatbotQuery.id > thread.summarized_through_id)\
+        .order_by(ChatbotQuery.id.desc())\
+        .limit(RECENT_TURNS + SUMMARY_BATCH)\
+        .all()
+    return {
+        'summary': thread.summary,
+        'turns': [(clip(question, MAX_TURN_CHARS), clip(answer, MAX_TURN_CHARS)) for question, answer in reversed(turns)]
+    }
+
+
+def record_turn(thread, query):
+    """Attach a stored question to its thread; the caller commits.
+
+    Queues a summary refresh each time another SUMMARY_BATCH turns have
+    fallen out of the recent window.
+    """
+    from app.services import job_service
+
+    query.thread_id = thread.id
+    # Incremented in SQL so concurrent turns on one thread are all counted
+    turn_count, summarized_turns = db.session.execute(
+        db.update(ChatThread)
+        .where(ChatThread.id == thread.id)
+        .values(turn_count=ChatThread.turn_count + 1, updated_at=datetime.utcnow())
+        .returning(ChatThread.turn_count, ChatThread.summarized_turns)
+        .execution_options(synchronize_session=False)
+    ).one()
+    db.session.expire(thread, ['turn_count', 'updated_at'])
+    if not thread.title:
+        thread.title = clip(query.question, 80)
+
+    overflow = turn_count - summarized_turns - RECENT_TURNS
+    if overflow > 0 and overflow % SUMMARY_BATCH == 0:
+        job_service.enqueue(thread.user_id, 'chat_summary', {'thread_id': thread.id})
+
+
+def reset_threads(thread_ids):
+    """Recount the turns of threads that lost some and restart their summaries; the caller commits"""
+    remaining = db.select(db.func.count())\
+        .where(ChatbotQuery.thread_id == ChatThread.id)\
+        .scalar_subquery()
+    db.session.execute(
+        db.update(ChatThread)
+        .where(ChatThread.id.in_(thread_ids))
+        .values(turn_count=remaining, summary=None, summarized_through_id=0, summarized_turns=0)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def refresh_summary(thread_id):
+    """Fold turns that have left the recent window into the thread summary; the caller commits.
+
+    Nothing is locked while the model runs, so new turns on the thread are
+    never held up by a summary. The result is saved only if the watermark it
+    started from is still current; otherwise another writer won and it is dropped.
+    """
+    from app.services.gemini_service import get_gemini
+
+    thread = db.session.query(ChatThread.summary, ChatThread.summarized_through_id)\
+        .filter(ChatThread.id == thread_id)\
+        .first()
+    if thread is None:
+        return None
+    previous_summary, watermark = thread
+
+    turns = ChatbotQuery.query.with_entities(ChatbotQuery.id, ChatbotQuery.question, ChatbotQuery.answer)\
+        .filter(ChatbotQuery.thread_id == thread_id, ChatbotQuery.id > watermark)\
+        .order_by(ChatbotQuery.id)\
+        .all()
+    fold = turns[:-RECENT_TURNS] if RECENT_TURNS else turns
+    if not fold:
+        return previous_summary
+
+    summary = clip(get_gemini().summarize_conversation(
+        previous_summary,
+        [(clip(question, MAX_TURN_CHARS), clip(answer, MAX_TURN_CHARS)) for _, question, answer in fold]
+    ), MAX_SUMMARY_CHARS)
+    saved = db.session.execute(
+        db.update(ChatThread)
+        .where(ChatThread.id == thread_id, ChatThread.summarized_through_id == watermark)
+        .values(
+            summary=summary,
+            summarized_through_id=fold[-1].id,
+            summarized_turns=ChatThread.summarized_turns + len(fold)
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not saved:
+        return None
+    return summary
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+# Latency is first-token delay (+/- jitter) followed by streaming at tokens_per_second
+PROFILES = {
+    'instant': {'latency': 0.0, 'jitter': 0.0, 'tokens_per_second': 0, 'error_rate': 0.0, 'stall_rate': 0.0},
+    'fast': {'latency': 0.05, 'jitter': 0.02, 'tokens_per_second': 2000, 'error_rate': 0.0, 'stall_rate': 0.0},
+    'realistic': {'latency': 0.6, 'jitter': 0.3, 'tokens_per_second': 120, 'error_rate': 0.01, 'stall_rate': 0.0},
+    'flaky': {'latency': 0.8, 'jitter': 0.6, 'tokens_per_second': 60, 'error_rate': 0.15, 'stall_rate': 0.05}
+}
+
+STALL_SECONDS = 120
+
+# Lite models answer sooner and stream faster, so tier routing is visible in load tests
+LITE_LATENCY_FACTOR = 0.4
+LITE_TOKEN_RATE_FACTOR = 2.5
+
+CHALLENGE_TEMPLATES = [
+    ('Push-Up', 'Strength', 'Strength'),
+    ('Plank', 'Core', 'Core Strength'),
+    ('Walking', 'Cardio', 'Weight Loss'),
+    ('Stretching', 'Flexibility', 'Maintain Fitness'),
+    ('Meditation', 'Mindfulness', 'Trauma Recovery'),
+    ('Squat', 'Strength', 'Weight Gain'),
+    ('Jump Rope', 'Stamina', 'Weight Loss'),
+    ('Yoga Flow', 'Flexibility', 'Maintain Fitness')
+]
+
+FOODS = [
+    ('Oatmeal with berries', 320), ('Greek yogurt', 150), ('Grilled chicken salad', 450),
+    ('Lentil soup', 380), ('Brown rice and vegetables', 420), ('Almonds', 170),
+    ('Salmon with quinoa', 520), ('Paneer tikka', 400), ('Fruit smoothie', 250), ('Boiled eggs', 140)
+]
+
+
+class ServiceUnavailable(Exception):
+    """Named like the SDK's transient error so retry logic treats it the same way"""
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Deterministic local stand-in for genai.GenerativeModel.
+
+    The same prompt always yields the same text, so load tests are
+    reproducible without quota. Latency, error and token-rate behaviour come
+    from a named profile (FAKE_GEMINI_PROFILE) with per-field env overrides.
+    """
+
+    def __init__(self, model_name, profile=None):
+        self.model_name = model_name
+        settings = dict(PROFILES[profile or os.getenv('FAKE_GEMINI_PROFILE', 'realistic')])
+        for field in settings:
+            override = os.getenv(f'FAKE_GEMINI_{field.upper()}')
+            if override is not None:
+                settings[field] = float(override)
+        if 'lite' in model_name:
+            settings['latency'] *= LITE_LATENCY_FACTOR
+            settings['jitter'] *= LITE_LATENCY_FACTOR
+            settings['tokens_per_second'] *= LITE_TOKEN_RATE_FACTOR
+        self.settings = settings
+        # Failures follow a seeded sequence so runs are repeatable
+        self._faults = random.Random(int(os.getenv('FAKE_GEMINI_SEED', 0)))
+        self._faults_lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        rng = random.Random(hashlib.sha256(f"{self.model_name}\0{prompt}".encode('utf-8')).digest())
+        text = self._render(prompt, rng)
+
+        with self._faults_lock:
+            roll = self._faults.random()
+        time.sleep(max(0.0, self.settings['latency'] + rng.uniform(-1, 1) * self.settings['jitter']))
+        if roll < self.settings['stall_rate']:
+            time.sleep(STALL_SECONDS)
+        if roll < self.settings['stall_rate'] + self.settings['error_rate']:
+            raise ServiceUnavailable(f'fake {self.model_name} is unavailable')
+
+        chunks = self._chunk(text)
+        if stream:
+            return self._stream(chunks)
+        for chunk in chunks:
+            self._pace(chunk)
+        return FakeResponse(text)
+
+    def _stream(self, chunks):
+        for chunk in chunks:
+            self._pace(chunk)
+            yield FakeResponse(chunk)
+
+    def _pace(self, chunk):
+        rate = self.settings['tokens_per_second']
+        if rate:
+            time.sleep(len(chunk.split()) / rate)
+
+    @staticmethod
+    def _chunk(text, words_per_chunk=8):
+        words = text.split(' ')
+        return [' '.join(words[i:i + words_per_chunk]) + (' ' if i + words_per_chunk < len(words) else '')
+                for i in range(0, len(words), words_per_chunk)]
+
+    def _render(self, prompt, rng):
+        lowered = prompt.lower()
+        if 'running summary' in lowered:
+            return self._summary(rng)
+        if 'json array' in lowered and 'challenge' in lowered:
+            return self._challenges(rng)
+        if 'diet plan' in lowered or 'meal plan' in lowered:
+            return self._diet_plan(rng)
+        return self._answer(rng)
+
+    @staticmethod
+    def _challenges(rng):
+        challenges = []
+        for name, challenge_type, goal in rng.sample(CHALLENGE_TEMPLATES, rng.randint(5, 7)):
+            days = rng.choice([7, 14, 21, 30])
+            challenges.append({
+                'title': f'{days}-Day {name} Challenge',
+                'type': challenge_type,
+                'duration': f'{days} Days',
+                'difficulty': rng.choice(['Beginner', 'Intermediate', 'Advanced']),
+                'goal': goal,
+                'description': f'Build a daily {name.lower()} habit over {days} days'
+            })
+        return json.dumps(challenges, indent=2)
+
+    @staticmethod
+    def _diet_plan(rng):
+        meals = []
+        for meal in ('Breakfast', 'Lunch', 'Snack', 'Dinner'):
+            items = []
+            for food, calories in rng.sample(FOODS, rng.randint(1, 3)):
+                items.append({
+                    'name': food,
+                    'quantity': '1 serving',
+                    'calories': calories,
+                    'protein_g': round(calories * rng.uniform(0.04, 0.09)),
+                    'carbs_g': round(calories * rng.uniform(0.08, 0.14)),
+                    'fat_g': round(calories * rng.uniform(0.02, 0.04))
+                })
+            meals.append({'name': meal, 'items': items})
+        return json.dumps({'meals': meals, 'notes': 'Drink plenty of water and adjust portions to hunger.'})
+
+    @staticmethod
+    def _summary(rng):
+        food, _ = rng.choice(FOODS)
+        return (f'The user wants practical, balanced meals and asked about portions and protein. '
+                f'Suggested {food.lower()} as an option and regular hydration.')
+
+    @staticmethod
+    def _answer(rng):
+        food, calories = rng.choice(FOODS)
+        return (f'A balanced approach works best. For example, {food.lower()} provides about '
+                f'{calories} kcal. Spread protein across meals, include vegetables and whole grains, '
+                f'and stay hydrated throughout the day.')
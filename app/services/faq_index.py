@@ -0,0 +1,198 @@
+import math
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from app.services.response_cache import STOPWORDS
+
+# Cosine similarity a question needs to be answered from the FAQ
+FAQ_MIN_SCORE = float(os.getenv('FAQ_MIN_SCORE', 0.75))
+# How often each process picks up FAQ rows curated through other processes
+FAQ_REFRESH_SECONDS = float(os.getenv('FAQ_REFRESH_SECONDS', 60))
+# Periodic full reload drops FAQ rows deleted outright, which leave no watermark trail
+FAQ_REBUILD_SECONDS = float(os.getenv('FAQ_REBUILD_SECONDS', 3600))
+
+
+def _stem(word):
+    # Light suffix folding so calories/calorie, berries/berry and eating/eat meet
+    if len(word) <= 3:
+        return word
+    for suffix in ('ing', 'ed'):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    if word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+    if len(word) <= 3:
+        return word
+    if word.endswith('ie') or word.endswith('y'):
+        return word[:-2 if word.endswith('ie') else -1] + 'i'
+    if word.endswith('e'):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    words = ''.join(ch if ch.isalnum() else ' ' for ch in (text or '').casefold()).split()
+    return [_stem(word) for word in words if word not in STOPWORDS]
+
+
+class FAQIndex:
+    """Sparse TF-IDF index over curated chatbot Q&A pairs.
+
+    Documents are the curated questions; vectors are plain dicts with an
+    inverted index for candidate lookup, so no numeric library is needed for
+    a few thousand entries. Adding or removing a document only touches its
+    own postings; document norms are recomputed lazily after the vocabulary
+    changes. Each process syncs incrementally from chatbot_queries using the
+    faq_updated_at watermark.
+    """
+
+    def __init__(self, min_score=FAQ_MIN_SCORE, refresh_seconds=FAQ_REFRESH_SECONDS, rebuild_seconds=FAQ_REBUILD_SECONDS):
+        self.min_score = min_score
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self._lock = threading.RLock()
+        self._clear()
+        self._rebuilt_at = None
+        self._synced_at = None
+        self._hits = 0
+        self._misses = 0
+
+    def _clear(self):
+        self._docs = {}  # id -> (Counter of terms, answer)
+        self._postings = {}  # term -> set of ids
+        self._norms = {}
+        self._norms_stale = True
+        self._watermark = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id, question, answer):
+        terms = Counter(tokenize(question))
+        with self._lock:
+            self._remove(doc_id)
+            if not terms or not answer:
+                return
+            self._docs[doc_id] = (terms, answer)
+            for term in terms:
+                self._postings.setdefault(term, set()).add(doc_id)
+            self._norms_stale = True
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        for term in entry[0]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[term]
+        self._norms_stale = True
+
+    def _idf(self, term):
+        # Smoothed so a term in every document still carries a little weight
+        return math.log((1 + len(self._docs)) / (1 + len(self._postings.get(term, ())))) + 1
+
+    @staticmethod
+    def _tf(count):
+        return 1 + math.log(count)
+
+    def _refresh_norms(self):
+        if not self._norms_stale:
+            return
+        idf = {term: self._idf(term) for term in self._postings}
+        self._norms = {
+            doc_id: math.sqrt(sum((self._tf(count) * idf[term]) ** 2 for term, count in terms.items()))
+            for doc_id, (terms, _) in self._docs.items()
+        }
+        self._norms_stale = False
+
+    def search(self, question):
+        """Return (doc_id, answer, cosine score) of the closest curated question, or None"""
+        terms = Counter(tokenize(question))
+        with self._lock:
+            if not terms or not self._docs:
+                return None
+            self._refresh_norms()
+            weights = {term: self._tf(count) * self._idf(term) for term, count in terms.items()}
+            query_norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+
+            scores = {}
+            for term, weight in weights.items():
+                for doc_id in self._postings.get(term, ()):
+                    doc_weight = self._tf(self._docs[doc_id][0][term]) * self._idf(term)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * doc_weight
+            if not scores:
+                return None
+
+            doc_id, dot = max(scores.items(), key=lambda item: item[1])
+            return doc_id, self._docs[doc_id][1], dot / (query_norm * self._norms[doc_id])
+
+    def match(self, question):
+        """Like search(), but only above the confidence threshold, after syncing if due"""
+        self.sync()
+        result = self.search(question)
+        hit = result is not None and result[2] >= self.min_score
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+        return result if hit else None
+
+    def sync(self, force=False):
+        """Apply FAQ rows curated or un-curated since the last sync"""
+        now = time.monotonic()
+        if not force and self._synced_at is not None and now - self._synced_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if not force and self._synced_at is not None and now - self._synced_at < self.refresh_seconds:
+                return
+            from app.models.chatbot_query import ChatbotQuery
+
+            if self._rebuilt_at is None or now - self._rebuilt_at >= self.rebuild_seconds:
+                self._clear()
+                self._rebuilt_at = now
+
+            query = ChatbotQuery.query.with_entities(
+                ChatbotQuery.id, ChatbotQuery.question, ChatbotQuery.answer,
+                ChatbotQuery.is_faq, ChatbotQuery.faq_updated_at
+            )
+            if self._watermark is None:
+                query = query.filter(ChatbotQuery.faq_updated_at.isnot(None))
+            else:
+                # Inclusive, so rows sharing the watermark timestamp are not missed; reapplying is harmless
+                query = query.filter(ChatbotQuery.faq_updated_at >= self._watermark)
+
+            watermark = self._watermark
+            for doc_id, question, answer, is_faq, updated_at in query.order_by(ChatbotQuery.faq_updated_at):
+                if is_faq:
+                    self.add(doc_id, question, answer)
+                else:
+                    self.remove(doc_id)
+                if updated_at is not None and (watermark is None or updated_at > watermark):
+                    watermark = updated_at
+            self._watermark = watermark or datetime.min
+            self._synced_at = now
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'documents': len(self._docs),
+                'terms': len(self._postings),
+                'min_score': self.min_score,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0
+            }
+
+
+faq_index = FAQIndex()
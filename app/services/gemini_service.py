@@ -1,13 +1,229 @@
-import google.generativeai as genai
+import hashlib
 import os
+import threading
+import time
+from app.services.ai_metrics import metrics
+from app.services.model_router import ModelRouter, ModelTier
+from app.services.resilience import CircuitOpenError, ConcurrencyLimitExceeded, is_transient
+from app.utils.diet_plan_schema import SCHEMA_EXAMPLE, DietPlanFormatError, parse_diet_plan
+from app.utils.json_stream import JSONArrayStream, parse_json_array
+
+MODEL_NAME = 'models/gemini-2.0-flash'
+LITE_MODEL_NAME = 'models/gemini-2.0-flash-lite'
+
+# Upper bound on simultaneous upstream calls from this process, split between the tiers
+MAX_CONCURRENT_CALLS = int(os.getenv('GEMINI_MAX_CONCURRENCY', 8))
+# Short chat answers free their slots quickly, so the lite tier gets the smaller share
+LITE_MAX_CONCURRENCY = int(os.getenv('GEMINI_LITE_MAX_CONCURRENCY', max(1, MAX_CONCURRENT_CALLS // 4)))
+
+
+class GeminiUnavailableError(Exception):
+    """The model could not be reached in time and no fallback applies"""
+
+
+class StreamTruncatedError(Exception):
+    """A streamed list broke off after some items were already yielded"""
+
+    def __init__(self, produced, cause):
+        super().__init__(f'stopped after {produced}: {type(cause).__name__}: {cause}')
+        self.produced = produced
+
+# Served when the model fails; stored as global rows since they are not personalized
+DEFAULT_CHALLENGES = [
+    {
+        "title": "30-Day Push-Up Challenge",
+        "type": "Strength",
+        "duration": "30 Days",
+        "difficulty": "Intermediate",
+        "goal": "Strength",
+        "description": "Build upper body strength with progressive push-up training"
+    },
+    {
+        "title": "7-Day Core Challenge",
+        "type": "Core",
+        "duration": "7 Days",
+        "difficulty": "Beginner",
+        "goal": "Core Strength",
+        "description": "Strengthen your core muscles with daily core exercises"
+    }
+]
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller (the leader) runs the function; callers that arrive
+    while it is in flight wait for and share its result or exception.
+    """
 
-class GeminiService:
     def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class ModelRegistry:
+    """Lazily constructed, process-wide Gemini models.
+
+    google.generativeai is only imported and configured when a model is first
+    requested, so create_app() and scripts that never call the AI skip the
+    SDK entirely. Models are rebuilt in a forked child (e.g. a preloading
+    server's workers) instead of sharing the parent's client.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._models = {}
+        self._pid = os.getpid()
+
+    def get(self, name=MODEL_NAME):
+        if self._pid != os.getpid():
+            self._reset()
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._models[name] = self._build(name)
+        return model
+
+    @staticmethod
+    def _build(name):
+        # GEMINI_BACKEND=fake swaps in a deterministic local model for load tests
+        if os.getenv('GEMINI_BACKEND', 'google') == 'fake':
+            from app.services.fake_gemini import FakeGenerativeModel
+
+            return FakeGenerativeModel(name)
+
+        import google.generativeai as genai
+
         genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        self.model = genai.GenerativeModel('models/gemini-2.0-flash')
+        return genai.GenerativeModel(name)
+
+
+registry = ModelRegistry()
+
+# Shared by every GeminiService instance in the process
+_in_flight = SingleFlight()
+
+
+def _tier(name, model_name, timeout, max_concurrency, latency_budget):
+    prefix = f'GEMINI_{name.upper()}_'
+    return ModelTier(
+        name,
+        os.getenv(prefix + 'MODEL', model_name),
+        timeout=float(os.getenv(prefix + 'TIMEOUT_SECONDS', timeout)),
+        idle_timeout=float(os.getenv('GEMINI_STREAM_IDLE_SECONDS', 15)),
+        max_concurrency=max_concurrency,
+        latency_budget=float(os.getenv(prefix + 'LATENCY_BUDGET_SECONDS', latency_budget)),
+        max_retries=int(os.getenv('GEMINI_MAX_RETRIES', 2)),
+        backoff_base=float(os.getenv('GEMINI_BACKOFF_BASE_SECONDS', 0.5)),
+        backoff_max=float(os.getenv('GEMINI_BACKOFF_MAX_SECONDS', 8)),
+        failure_threshold=int(os.getenv('GEMINI_BREAKER_THRESHOLD', 5)),
+        reset_timeout=float(os.getenv('GEMINI_BREAKER_RESET_SECONDS', 30))
+    )
+
+
+# Short chat questions go to the lite tier; structured output and long questions to standard
+router = ModelRouter(
+    lite=_tier('lite', LITE_MODEL_NAME, timeout=10, max_concurrency=LITE_MAX_CONCURRENCY, latency_budget=4),
+    standard=_tier('standard', MODEL_NAME, timeout=float(os.getenv('GEMINI_TIMEOUT_SECONDS', 30)),
+                   max_concurrency=max(1, MAX_CONCURRENT_CALLS - LITE_MAX_CONCURRENCY), latency_budget=20),
+    lite_max_chars=int(os.getenv('GEMINI_LITE_MAX_CHARS', 240))
+)
+
+
+def _reset_after_fork():
+    # Locks and in-flight calls inherited from the parent are meaningless in the child
+    global _in_flight, _service
+    registry._reset()
+    _in_flight = SingleFlight()
+    router.reset()
+    metrics.reset()
+    _service = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class GeminiService:
+    @staticmethod
+    def _route(method, question_chars=None, structured=False):
+        tier, rerouted = router.choose(question_chars, structured)
+        metrics.increment(method, f'tier_{tier.name}')
+        if rerouted:
+            metrics.increment(method, 'rerouted')
+        return tier
+
+    def _generate(self, prompt, method, tier):
+        """Return the model's text for a prompt, sharing one upstream call among identical prompts"""
+        key = hashlib.sha256(f"{tier.model_name}\0{prompt}".encode('utf-8')).hexdigest()
+
+        def call_model():
+            started = time.monotonic()
+            text = registry.get(tier.model_name).generate_content(prompt).text
+            tier.record_latency(time.monotonic() - started)
+            return text
+
+        led = []
+
+        def call_upstream():
+            # Only the single-flight leader reaches the upstream, so only it is measured
+            led.append(True)
+            started = time.monotonic()
+            text = error = None
+            try:
+                text = tier.caller.call(call_model)
+                return text
+            except Exception as e:
+                error = self._unavailable(e)
+                raise error
+            finally:
+                metrics.observe(method, time.monotonic() - started, prompt, text, error)
+
+        try:
+            return _in_flight.do(key, call_upstream)
+        finally:
+            if not led:
+                metrics.increment(method, 'coalesced')
 
     def generate_diet_plan(self, user_data):
-        """Generate personalized diet plan using Gemini"""
+        """Generate a personalized diet plan using Gemini, parsed into the compact schema"""
         prompt = f"""
         Create a detailed diet plan for:
         Age: {user_data['age']}
@@ -20,28 +236,158 @@ class GeminiService:
         Health Conditions: {user_data.get('health_conditions', [])}
 
         Provide a complete daily meal plan with breakfast, lunch, snack, and dinner.
-        Include calorie counts and nutritional information.
+        Give calories, protein_g, carbs_g and fat_g as plain numbers for every item.
+
+        Format the response as a single JSON object shaped exactly like this example:
+        {SCHEMA_EXAMPLE}
+
+        Return ONLY the JSON object, no additional text.
         """
-        response = self.model.generate_content(prompt)
-        return response.text
+        tier = self._route('generate_diet_plan', structured=True)
+        try:
+            return parse_diet_plan(self._generate(prompt, 'generate_diet_plan', tier))
+        except DietPlanFormatError as e:
+            # One corrective retry; a second malformed answer is an error
+            metrics.increment('generate_diet_plan', 'format_retries')
+            retry_prompt = f"{prompt}\n\nYour previous answer was rejected ({e}). Return valid JSON only."
+            return parse_diet_plan(self._generate(retry_prompt, 'generate_diet_plan', tier))
 
-    def chat_response(self, question, context="diet"):
+    def chat_response(self, question, context="diet", history=None):
         """Generate chatbot response - restricted to diet topics"""
         if context != "diet":
             return "I can only answer questions related to diet and nutrition."
 
+        tier = self._route('chat_response', question_chars=len(question))
+        return self._generate(self._chat_prompt(question, history), 'chat_response', tier)
+
+    def stream_chat_response(self, question, history=None):
+        """Yield chatbot answer text chunks as the model produces them"""
+        tier = self._route('stream_chat_response', question_chars=len(question))
+        return self._stream(self._chat_prompt(question, history), 'stream_chat_response', tier)
+
+    def summarize_conversation(self, summary, turns):
+        """Fold (question, answer) turns into a running conversation summary"""
+        transcript = '\n'.join(f"User: {question}\nNutritionist: {answer}" for question, answer in turns)
         prompt = f"""
+        Update the running summary of a conversation between a user and a nutritionist.
+
+        Current summary:
+        {summary or 'None yet.'}
+
+        New turns:
+        {transcript}
+
+        Keep the user's goals, dietary preferences, restrictions, health conditions and
+        any advice already given. Write at most 150 words of plain text, no headings.
+        """
+        # Short, unstructured output suits the lite tier
+        tier = self._route('summarize_conversation', question_chars=0)
+        return self._generate(prompt, 'summarize_conversation', tier).strip()
+
+    @staticmethod
+    def _unavailable(error):
+        """Translate errors that mean "try again later" so routes can answer 503"""
+        if isinstance(error, (CircuitOpenError, ConcurrencyLimitExceeded)) or is_transient(error):
+            return GeminiUnavailableError(f'{type(error).__name__}: {error}')
+        return error
+
+    def _stream(self, prompt, method, tier):
+        """Yield the model's text chunks for a prompt under the tier's breaker, deadlines and concurrency cap.
+
+        The first chunk must arrive within the tier timeout and each later one
+        within GEMINI_STREAM_IDLE_SECONDS of the previous, so a stalled
+        upstream cannot pin the request or the job worker.
+        """
+        started = time.monotonic()
+        chunks = []
+        error = None
+        try:
+            response = tier.caller.stream(lambda: registry.get(tier.model_name).generate_content(prompt, stream=True))
+            for chunk in response:
+                if chunk.text:
+                    if not chunks:
+                        metrics.observe_first_chunk(method, time.monotonic() - started)
+                    chunks.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            if isinstance(e, CircuitOpenError):
+                metrics.increment(method, 'rejected')
+            error = self._unavailable(e)
+            if error is e:
+                raise
+            raise error from e
+        finally:
+            if error is None:
+                tier.record_latency(time.monotonic() - started)
+            metrics.observe(method, time.monotonic() - started, prompt, ''.join(chunks), error)
+
+    @staticmethod
+    def _chat_prompt(question, history=None):
+        context = ''
+        if history and (history.get('summary') or history.get('turns')):
+            recent = '\n'.join(f"User: {q}\nNutritionist: {a}" for q, a in history.get('turns', []))
+            context = f"""
+        Earlier in this conversation (summary):
+        {history.get('summary') or 'Nothing yet.'}
+
+        Most recent turns:
+        {recent or 'None.'}
+        """
+        return f"""
         As a professional nutritionist, answer this question:
         {question}
-
+{context}
         Provide accurate, helpful information about diet and nutrition.
         """
-        response = self.model.generate_content(prompt)
-        return response.text
 
     def suggest_challenges(self, user_data):
         """Generate personalized fitness challenges using Gemini"""
-        prompt = f"""
+        try:
+            tier = self._route('suggest_challenges', structured=True)
+            text = self._generate(self._challenges_prompt(user_data), 'suggest_challenges', tier)
+            challenges = [item for item in parse_json_array(text) if isinstance(item, dict)]
+            if not challenges:
+                raise ValueError('No challenges in model output')
+            return challenges
+        except Exception as e:
+            # Fallback to default challenges if AI fails or the breaker is open
+            print(f"⚠️  suggest_challenges falling back to defaults: {type(e).__name__}: {e}")
+            metrics.increment('suggest_challenges', 'fallbacks')
+            return [dict(challenge) for challenge in DEFAULT_CHALLENGES]
+
+    def stream_suggest_challenges(self, user_data):
+        """Yield challenge dicts one at a time as each object in the streamed JSON array completes.
+
+        Falls back to the default challenges if nothing was produced. A
+        stream that breaks after some challenges raises StreamTruncatedError
+        once the yielded ones have been consumed, so callers can keep them
+        without mistaking them for the complete list.
+        """
+        produced = 0
+        parser = JSONArrayStream()
+        try:
+            tier = self._route('stream_suggest_challenges', structured=True)
+            for chunk in self._stream(self._challenges_prompt(user_data), 'stream_suggest_challenges', tier):
+                for item in parser.feed(chunk):
+                    if isinstance(item, dict):
+                        produced += 1
+                        yield item
+            parser.close()
+            if not produced:
+                raise ValueError('No challenges in model output')
+        except Exception as e:
+            if produced:
+                print(f"⚠️  stream_suggest_challenges stopped after {produced}: {type(e).__name__}: {e}")
+                metrics.increment('stream_suggest_challenges', 'truncated')
+                raise StreamTruncatedError(produced, e)
+            print(f"⚠️  stream_suggest_challenges falling back to defaults: {type(e).__name__}: {e}")
+            metrics.increment('stream_suggest_challenges', 'fallbacks')
+            for challenge in DEFAULT_CHALLENGES:
+                yield dict(challenge)
+
+    @staticmethod
+    def _challenges_prompt(user_data):
+        return f"""
         As a professional fitness trainer, suggest 5-10 personalized fitness challenges based on the following user information:
         
         Age: {user_data.get('age', 'Not provided')}
@@ -77,37 +423,17 @@ class GeminiService:
         
         Return ONLY the JSON array, no additional text.
         """
-        try:
-            response = self.model.generate_content(prompt)
-            # Extract JSON from response
-            import json
-            import re
-            text = response.text.strip()
-            # Try to extract JSON array from the response
-            json_match = re.search(r'\[.*\]', text, re.DOTALL)
-            if json_match:
-                challenges_json = json.loads(json_match.group())
-                return challenges_json
-            else:
-                # Fallback: try to parse the entire response
-                return json.loads(text)
-        except Exception as e:
-            # Fallback to default challenges if AI fails
-            return [
-                {
-                    "title": "30-Day Push-Up Challenge",
-                    "type": "Strength",
-                    "duration": "30 Days",
-                    "difficulty": "Intermediate",
-                    "goal": "Strength",
-                    "description": "Build upper body strength with progressive push-up training"
-                },
-                {
-                    "title": "7-Day Core Challenge",
-                    "type": "Core",
-                    "duration": "7 Days",
-                    "difficulty": "Beginner",
-                    "goal": "Core Strength",
-                    "description": "Strengthen your core muscles with daily core exercises"
-                }
-            ]
\ No newline at end of file
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_gemini():
+    """Return the process-wide GeminiService, creating it on first use"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = GeminiService()
+    return _service
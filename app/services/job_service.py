@@ -0,0 +1,166 @@
+import os
+import traceback
+from datetime import datetime, timedelta
+from app import db
+from app.models.generation_job import GenerationJob
+from app.models.diet_plan import DietPlan
+from app.services.gemini_service import StreamTruncatedError, get_gemini
+from app.utils.diet_plan_schema import totals_columns
+
+# Running jobs older than this are assumed orphaned by a dead worker
+STALE_JOB_SECONDS = int(os.getenv('JOB_STALE_SECONDS', 300))
+MAX_JOB_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+# Streamed challenges are written in batches of this size while the model is still producing
+CHALLENGE_FLUSH_SIZE = int(os.getenv('CHALLENGE_FLUSH_SIZE', 3))
+
+
+def store_diet_plan(user_id, data, ai_response, cache_hit):
+    """Save a generated plan for a user and return the job-style result; the caller commits"""
+    diet_plan = DietPlan(
+        user_id=user_id,
+        diet_plan={
+            'user_info': data,
+            'meal_plan': ai_response,
+            'generated_by': 'gemini-ai'
+        },
+        goal=data.get('goal'),
+        diet_type=data.get('diet_type'),
+        duration=data.get('duration', '1_month'),
+        **totals_columns(ai_response)
+    )
+    db.session.add(diet_plan)
+    db.session.flush()
+
+    return {
+        'diet_plan': {
+            'id': diet_plan.id,
+            'plan': diet_plan.diet_plan,
+            'created_at': diet_plan.created_at.isoformat()
+        },
+        'cache_hit': cache_hit
+    }
+
+
+def _generate_diet_plan(job):
+    from app.services.response_cache import diet_plan_cache
+
+    ai_response, cache_hit = diet_plan_cache.get_or_generate(job.payload, get_gemini().generate_diet_plan)
+    return store_diet_plan(job.user_id, job.payload, ai_response, cache_hit)
+
+
+def _generate_challenges(job):
+    from app.services import challenge_pool
+    from app.services.challenge_service import save_generated_challenges
+
+    # Another job for the same cohort may have filled the pool while this one waited
+    cohort = challenge_pool.cohort_for(job.payload)
+    suggestions = challenge_pool.fresh_pool(cohort)
+    if suggestions is not None:
+        return {'challenges': save_generated_challenges(job.user_id, suggestions), 'source': 'pool'}
+
+    suggestions = []
+    saved = {}
+    pending = []
+
+    def save(batch):
+        # One multi-row insert per batch; a repeat of an earlier suggestion maps to the same row
+        for challenge in save_generated_challenges(job.user_id, batch):
+            saved.setdefault(challenge['id'], challenge)
+
+    truncated = False
+    try:
+        for challenge in get_gemini().stream_suggest_challenges(challenge_pool.cohort_profile(cohort)):
+            suggestions.append(challenge)
+            pending.append(challenge)
+            # Publish the first challenge at once, then the rest in small batches
+            if len(suggestions) == 1 or len(pending) >= CHALLENGE_FLUSH_SIZE:
+                save(pending)
+                pending = []
+                # Committing makes the partial result visible to pollers
+                job.result = {'challenges': list(saved.values()), 'source': 'model', 'partial': True}
+                db.session.commit()
+    except StreamTruncatedError:
+        # Keep what the user already saw, but never pool an incomplete list for every cohort member
+        truncated = True
+    if pending:
+        save(pending)
+
+    if not truncated:
+        challenge_pool.store_pool(cohort, suggestions)
+    return {'challenges': list(saved.values()), 'source': 'model', 'partial': False, 'truncated': truncated}
+
+
+def _summarize_chat_thread(job):
+    from app.services.chat_context import refresh_summary
+
+    return {'summary': refresh_summary(job.payload['thread_id'])}
+
+
+HANDLERS = {
+    'diet_plan': _generate_diet_plan,
+    'challenges': _generate_challenges,
+    'chat_summary': _summarize_chat_thread
+}
+
+
+def enqueue(user_id, kind, payload):
+    """Queue a generation job; the caller commits"""
+    if kind not in HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    job = GenerationJob(user_id=int(user_id), kind=kind, payload=payload, status='queued')
+    db.session.add(job)
+    return job
+
+
+def claim_next():
+    """Atomically move the oldest queued job to running, or return None"""
+    job = GenerationJob.query.filter_by(status='queued')\
+        .order_by(GenerationJob.created_at)\
+        .with_for_update(skip_locked=True)\
+        .first()
+    if job is None:
+        db.session.rollback()
+        return None
+
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    job.attempts += 1
+    db.session.commit()
+    return job
+
+
+def run(job):
+    """Execute a claimed job and record its outcome"""
+    try:
+        result = HANDLERS[job.kind](job)
+        job.status = 'succeeded'
+        job.result = result
+        job.error = None
+    except Exception as e:
+        db.session.rollback()
+        traceback.print_exc()
+        job = GenerationJob.query.get(job.id)
+        job.status = 'failed'
+        job.error = str(e)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def requeue_stale():
+    """Put jobs abandoned by a crashed worker back in the queue, failing repeat offenders"""
+    cutoff = datetime.utcnow() - timedelta(seconds=STALE_JOB_SECONDS)
+    stale = GenerationJob.query.filter(
+        GenerationJob.status == 'running',
+        GenerationJob.started_at < cutoff
+    ).with_for_update(skip_locked=True).all()
+
+    for job in stale:
+        if job.attempts >= MAX_JOB_ATTEMPTS:
+            job.status = 'failed'
+            job.error = 'Job timed out'
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = 'queued'
+    db.session.commit()
+    return len(stale)
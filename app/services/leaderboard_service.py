@@ -0,0 +1,153 @@
+import bisect
+import os
+import threading
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app import db
+from app.models.challenge import ChallengeLeaderboardEntry
+from app.services.response_cache import LRUCache
+
+class ChallengeRanking:
+    """Sorted ranking of one challenge's participants"""
+
+    def __init__(self, entries=()):
+        self._keys = []
+        self._by_user = {}
+        for user_id, days_completed, last_progress_at in entries:
+            self._by_user[user_id] = self._key(user_id, days_completed, last_progress_at)
+        self._keys = sorted(self._by_user.values())
+
+    @staticmethod
+    def _key(user_id, days_completed, last_progress_at):
+        # More days first, then whoever got there earliest
+        return (-days_completed, last_progress_at.timestamp() if last_progress_at else float('inf'), user_id)
+
+    def update(self, user_id, days_completed, last_progress_at):
+        old_key = self._by_user.get(user_id)
+        if old_key is not None:
+            del self._keys[bisect.bisect_left(self._keys, old_key)]
+        new_key = self._key(user_id, days_completed, last_progress_at)
+        bisect.insort(self._keys, new_key)
+        self._by_user[user_id] = new_key
+
+    def top(self, limit):
+        return [(rank, key[2], -key[0]) for rank, key in enumerate(self._keys[:limit], start=1)]
+
+    def rank(self, user_id):
+        key = self._by_user.get(user_id)
+        if key is None:
+            return None
+        return bisect.bisect_left(self._keys, key) + 1, -key[0]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class LeaderboardService:
+    """Incrementally maintained challenge leaderboards.
+
+    challenge_leaderboard is the durable summary; each process keeps a sorted
+    ranking per challenge that is loaded from it on first use, patched after
+    every committed mark, and reloaded periodically to pick up marks made by
+    other processes. At most max_challenges rankings are kept, least recently
+    viewed evicted first.
+    """
+
+    def __init__(self, refresh_seconds=None, max_challenges=None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else \
+            int(os.getenv('LEADERBOARD_REFRESH_SECONDS', 60))
+        self._lock = threading.Lock()
+        # An expired ranking is reloaded, which also picks up other processes' marks
+        self._rankings = LRUCache(
+            max_size=max_challenges or int(os.getenv('LEADERBOARD_CACHE_SIZE', 1000)),
+            ttl_seconds=self.refresh_seconds
+        )
+
+    def record_progress(self, user_id, challenge_ids, marked_at):
+        """Bump the user's summary rows; rankings are patched once the session commits"""
+        statement = pg_insert(ChallengeLeaderboardEntry).values([{
+            'challenge_id': challenge_id,
+            'user_id': user_id,
+            'days_completed': 1,
+            'last_progress_at': marked_at
+        } for challenge_id in challenge_ids])
+        statement = statement.on_conflict_do_update(
+            index_elements=['challenge_id', 'user_id'],
+            set_={
+                'days_completed': ChallengeLeaderboardEntry.days_completed + 1,
+                'last_progress_at': statement.excluded.last_progress_at
+            }
+        ).returning(ChallengeLeaderboardEntry.challenge_id, ChallengeLeaderboardEntry.days_completed)
+        rows = db.session.execute(statement).all()
+
+        pending = db.session.info.setdefault(_PENDING_KEY, [])
+        pending.extend((challenge_id, int(user_id), days_completed, marked_at) for challenge_id, days_completed in rows)
+        return dict(rows)
+
+    def top(self, challenge_id, limit=10):
+        """Return [(rank, user_id, days_completed), ...] for the best participants"""
+        ranking = self._ranking(challenge_id)
+        with self._lock:
+            return ranking.top(limit), len(ranking)
+
+    def rank(self, challenge_id, user_id):
+        """Return (rank, days_completed, participants) or None if the user never marked progress"""
+        ranking = self._ranking(challenge_id)
+        with self._lock:
+            position = ranking.rank(int(user_id))
+            if position is None:
+                return None
+            return position[0], position[1], len(ranking)
+
+    def apply(self, updates):
+        """Patch loaded rankings with committed summary values"""
+        with self._lock:
+            for challenge_id, user_id, days_completed, marked_at in updates:
+                ranking = self._rankings.get(challenge_id)
+                if ranking is not None:
+                    ranking.update(user_id, days_completed, marked_at)
+
+    def invalidate(self, challenge_id=None):
+        if challenge_id is None:
+            self._rankings.clear()
+        else:
+            self._rankings.discard(int(challenge_id))
+
+    def _ranking(self, challenge_id):
+        challenge_id = int(challenge_id)
+        ranking = self._rankings.get(challenge_id)
+        if ranking is not None:
+            return ranking
+
+        entries = db.session.query(
+            ChallengeLeaderboardEntry.user_id,
+            ChallengeLeaderboardEntry.days_completed,
+            ChallengeLeaderboardEntry.last_progress_at
+        ).filter(
+            ChallengeLeaderboardEntry.challenge_id == challenge_id,
+            ChallengeLeaderboardEntry.days_completed > 0
+        ).all()
+        ranking = ChallengeRanking(entries)
+
+        self._rankings.set(challenge_id, ranking)
+        return ranking
+
+
+leaderboards = LeaderboardService()
+
+_PENDING_KEY = 'leaderboard_pending'
+
+
+def _apply_after_commit(session):
+    updates = session.info.pop(_PENDING_KEY, None)
+    if updates:
+        leaderboards.apply(updates)
+
+
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(Session, 'after_commit', _apply_after_commit)
+event.listen(Session, 'after_rollback', _discard_after_rollback)
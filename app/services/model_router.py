@@ -0,0 +1,123 @@
+import threading
+from collections import deque
+from app.services.resilience import CircuitBreaker, ResilientCaller
+
+# Recent successful latencies kept per tier for routing decisions
+LATENCY_WINDOW = 100
+# Below this many samples a tier's latency is not trusted enough to reroute on
+MIN_LATENCY_SAMPLES = 20
+
+
+class ModelTier:
+    """One model with its own breaker, deadlines, retry policy and concurrency cap"""
+
+    def __init__(self, name, model_name, timeout, max_concurrency, latency_budget, idle_timeout=None,
+                 max_retries=2, backoff_base=0.5, backoff_max=8.0, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.latency_budget = latency_budget
+        self.breaker = CircuitBreaker(f'gemini-{name}', failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        self.caller = ResilientCaller(
+            self.breaker,
+            timeout=timeout,
+            idle_timeout=idle_timeout,
+            max_retries=max_retries,
+            backoff_base=backoff_base,
+            backoff_max=backoff_max,
+            max_concurrency=max_concurrency
+        )
+        self.reset()
+
+    def reset(self):
+        """Fresh pool and counters (used after fork, where the parent's state is meaningless)"""
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.caller.reset()
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def p95(self):
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def is_open(self):
+        # Not open once the cool-down is over, so routing sends the request that probes the tier
+        return self.breaker.is_open()
+
+    def saturated(self):
+        return self.caller.limiter.in_flight >= self.max_concurrency
+
+    def slow(self):
+        p95 = self.p95()
+        return p95 is not None and p95 > self.latency_budget
+
+    def degraded(self):
+        return self.is_open() or self.saturated() or self.slow()
+
+    def snapshot(self):
+        p95 = self.p95()
+        return {
+            'model': self.model_name,
+            'in_flight': self.caller.limiter.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'timeout_seconds': self.caller.timeout,
+            'stream_idle_timeout_seconds': self.caller.idle_timeout,
+            'latency_budget_seconds': self.latency_budget,
+            'p95_seconds': round(p95, 3) if p95 is not None else None,
+            'breaker': self.breaker.snapshot()
+        }
+
+
+class ModelRouter:
+    """Picks a model tier per request.
+
+    Structured output (diet plans, challenge lists) and long questions go to
+    the standard tier; short chat questions go to the lite tier. A request
+    spills to the other tier when its preferred tier is open, saturated or
+    over its p95 latency budget and the other tier is not. Structured
+    requests only drop to lite when the standard breaker is open.
+    """
+
+    LITE = 'lite'
+    STANDARD = 'standard'
+
+    def __init__(self, lite, standard, lite_max_chars=240):
+        self.tiers = {self.LITE: lite, self.STANDARD: standard}
+        self.lite_max_chars = lite_max_chars
+
+    def preferred(self, question_chars=None, structured=False):
+        if structured or question_chars is None or question_chars > self.lite_max_chars:
+            return self.STANDARD
+        return self.LITE
+
+    def choose(self, question_chars=None, structured=False):
+        """Return (tier, rerouted)"""
+        name = self.preferred(question_chars, structured)
+        tier = self.tiers[name]
+        other = self.tiers[self.STANDARD if name == self.LITE else self.LITE]
+        if not tier.degraded() or other.degraded():
+            return tier, False
+        if structured and not tier.is_open():
+            # Slower structured output beats lower quality structured output
+            return tier, False
+        return other, True
+
+    def unavailable_for(self, question_chars=None, structured=False):
+        """Seconds until a request like this could reach a model, or None if it can now"""
+        tier, _ = self.choose(question_chars, structured)
+        if not tier.is_open():
+            return None
+        return tier.breaker.retry_in()
+
+    def reset(self):
+        for tier in self.tiers.values():
+            tier.reset()
+
+    def snapshot(self):
+        return {name: tier.snapshot() for name, tier in self.tiers.items()}
@@ -0,0 +1,286 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an upstream call does not finish within its deadline"""
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """Raised when no local concurrency slot frees up in time; says nothing about the upstream"""
+
+
+# Upstream errors worth retrying, matched by name so the SDK is never imported here
+TRANSIENT_ERROR_NAMES = {
+    'DeadlineExceeded', 'ServiceUnavailable', 'ResourceExhausted', 'TooManyRequests',
+    'InternalServerError', 'GatewayTimeout', 'Aborted'
+}
+
+
+def is_transient(error):
+    return isinstance(error, (DeadlineExceeded, TimeoutError, ConnectionError)) or \
+        type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open probe after a cool-down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._rejected = 0
+
+    def allow(self):
+        """Return True if a call may go upstream now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                # Let exactly one probe through to test the upstream
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def _turning_away(self):
+        if self._state == self.OPEN:
+            return time.monotonic() - self._opened_at < self.reset_timeout
+        return self._state == self.HALF_OPEN and self._probe_in_flight
+
+    def is_open(self):
+        """True while every call is turned away: cooling down, or half-open with its probe out.
+
+        Unlike allow() this never starts a probe, so it is safe for routing and admission checks.
+        """
+        with self._lock:
+            return self._turning_away()
+
+    def retry_in(self):
+        """Seconds until the breaker lets a call through again; 0 once the cool-down is over"""
+        with self._lock:
+            if self._state == self.OPEN:
+                return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return 0.0
+
+    def reject(self):
+        """Count a call turned away by an is_open() check"""
+        with self._lock:
+            self._rejected += 1
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                'name': self.name,
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'rejected_calls': self._rejected,
+                'retry_in_seconds': retry_in
+            }
+
+
+class ConcurrencyLimiter:
+    """Counting semaphore that also reports how many slots are held"""
+
+    def __init__(self, name, max_concurrency):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def acquire(self, timeout):
+        if not self._slots.acquire(timeout=timeout):
+            raise ConcurrencyLimitExceeded(
+                f'{self.name} has {self.max_concurrency} calls in flight; no slot freed within {timeout:.1f}s'
+            )
+        with self._lock:
+            self._in_flight += 1
+
+    def release(self, *_):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    @property
+    def in_flight(self):
+        with self._lock:
+            return self._in_flight
+
+
+_END = object()
+
+
+class ResilientCaller:
+    """Runs upstream calls with a deadline, bounded jittered retries, a circuit breaker and a concurrency cap.
+
+    A call takes a concurrency slot before it is submitted, so time spent
+    queueing behind slow but healthy calls is never charged to the deadline
+    or the breaker. A call that misses its deadline keeps its slot until it
+    actually finishes, so abandoned calls still count against the cap.
+    """
+
+    def __init__(self, breaker, timeout=30.0, max_retries=2, backoff_base=0.5, backoff_max=8.0,
+                 max_concurrency=8, idle_timeout=None):
+        self.breaker = breaker
+        self.timeout = timeout
+        # Longest gap allowed between streamed items once the first has arrived
+        self.idle_timeout = idle_timeout or timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self.reset()
+
+    def _pool(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # Every running task holds a slot, so one thread per slot is enough
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='upstream')
+        return self._executor
+
+    def reset(self):
+        """Forget the worker pool and slots (used after fork, where their threads do not exist)"""
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.limiter = ConcurrencyLimiter(self.breaker.name, self.max_concurrency)
+
+    def backoff(self, attempt):
+        # Full jitter: sleep anywhere between 0 and the capped exponential delay
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _admit(self, timeout):
+        """Take a slot, then ask the breaker; returns the limiter to release.
+
+        An open breaker is checked before queueing as well, so callers fail at
+        once instead of waiting out the slot timeout behind abandoned calls.
+        Only the check after the slot is taken may start a half-open probe.
+        """
+        if self.breaker.is_open():
+            self.breaker.reject()
+            raise CircuitOpenError(f'{self.breaker.name} is temporarily unavailable')
+        limiter = self.limiter
+        limiter.acquire(timeout)
+        if not self.breaker.allow():
+            limiter.release()
+            raise CircuitOpenError(f'{self.breaker.name} is temporarily unavailable')
+        return limiter
+
+    def _await(self, future, timeout):
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            # Not started yet: dropped. Already running: it finishes upstream, but nobody waits for it
+            future.cancel()
+            raise DeadlineExceeded(f'{self.breaker.name} call exceeded {timeout:.1f}s')
+
+    def _settle(self, error, attempt):
+        """Feed a failed attempt to the breaker; re-raise it unless another attempt is due"""
+        if not is_transient(error):
+            # The upstream answered; the request itself was bad
+            self.breaker.record_success()
+            raise error
+
+        self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            raise error
+        time.sleep(self.backoff(attempt))
+
+    def call(self, fn, timeout=None):
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            limiter = self._admit(timeout)
+            future = self._pool().submit(fn)
+            # Runs when fn returns or the future is cancelled, whether or not anyone still waits
+            future.add_done_callback(limiter.release)
+            try:
+                result = self._await(future, timeout)
+            except Exception as e:
+                self._settle(e, attempt)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def stream(self, fn, timeout=None):
+        """Yield the items of the iterable fn() returns, under deadlines for the first item and each gap.
+
+        An attempt that fails before yielding anything is retried like
+        call(); once items have been yielded the consumer has acted on them,
+        so a later failure is raised as is. A consumer that stops early still
+        counts as a success.
+        """
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            limiter = self._admit(timeout)
+            future = error = None
+            yielded = False
+            try:
+                future = self._pool().submit(lambda: iter(fn()))
+                iterator = self._await(future, timeout)
+                while True:
+                    future = self._pool().submit(next, iterator, _END)
+                    item = self._await(future, self.idle_timeout if yielded else timeout)
+                    if item is _END:
+                        break
+                    yielded = True
+                    yield item
+            except GeneratorExit:
+                self.breaker.record_success()
+                raise
+            except Exception as e:
+                if yielded:
+                    if is_transient(e):
+                        self.breaker.record_failure()
+                    raise
+                error = e
+            finally:
+                # A stalled pull keeps the slot until it returns, like an abandoned call()
+                if future is not None and not future.done():
+                    future.add_done_callback(limiter.release)
+                else:
+                    limiter.release()
+
+            if error is None:
+                self.breaker.record_success()
+                return
+            self._settle(error, attempt)
+            attempt += 1
@@ -0,0 +1,300 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app import db
+from app.models.ai_response_cache import AIResponseCache
+
+class LRUCache:
+    """Thread-safe in-process LRU with an optional per-entry TTL"""
+
+    def __init__(self, max_size=256, ttl_seconds=None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DietPlanCache:
+    """Two-tier cache in front of GeminiService.generate_diet_plan.
+
+    Profiles are normalized and bucketed (age band, weight and height rounded
+    to a couple of units) so near-identical requests share one plan. Lookups
+    try the in-process LRU, then the ai_response_cache table, and only then
+    call the model.
+    """
+
+    # Versioned so free-text plans cached before the structured schema are never served
+    NAMESPACE = 'diet_plan_v2'
+
+    def __init__(self):
+        self.ttl = timedelta(hours=int(os.getenv('DIET_CACHE_TTL_HOURS', 24 * 7)))
+        self.max_rows = int(os.getenv('DIET_CACHE_MAX_ROWS', 5000))
+        self.evict_every = int(os.getenv('DIET_CACHE_EVICT_EVERY', 50))
+        self.memory = LRUCache(
+            max_size=int(os.getenv('DIET_CACHE_MEMORY_SIZE', 256)),
+            ttl_seconds=self.ttl.total_seconds()
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {'memory_hits': 0, 'database_hits': 0, 'misses': 0, 'generation_seconds': 0.0}
+
+    @staticmethod
+    def _bucket(value, width):
+        try:
+            return int(round(float(value) / width) * width)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _text(value):
+        return ' '.join(str(value or '').casefold().split())
+
+    def profile_key(self, user_data):
+        """Normalized, bucketed profile that identifies interchangeable plans"""
+        conditions = user_data.get('health_conditions') or []
+        if isinstance(conditions, str):
+            conditions = conditions.split(',')
+        return {
+            'age': self._bucket(user_data.get('age'), 5),
+            'gender': self._text(user_data.get('gender')),
+            'weight': self._bucket(user_data.get('weight'), 2),
+            'height': self._bucket(user_data.get('height'), 2),
+            'activity_level': self._text(user_data.get('activity_level')),
+            'goal': self._text(user_data.get('goal')),
+            'diet_type': self._text(user_data.get('diet_type')),
+            'health_conditions': sorted({self._text(c) for c in conditions if self._text(c)})
+        }
+
+    def cache_key(self, profile):
+        raw = json.dumps([self.NAMESPACE, profile], sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def lookup(self, user_data):
+        """Return (plan, hit) from the cache alone, or (None, None) on a miss"""
+        key = self.cache_key(self.profile_key(user_data))
+
+        plan = self.memory.get(key)
+        if plan is not None:
+            self._count('memory_hits')
+            return plan, 'memory'
+
+        now = datetime.utcnow()
+        row = AIResponseCache.query.filter(
+            AIResponseCache.cache_key == key,
+            AIResponseCache.created_at >= now - self.ttl
+        ).first()
+        if row is not None:
+            row.hit_count += 1
+            row.last_hit_at = now
+            self.memory.set(key, row.response)
+            self._count('database_hits')
+            return row.response, 'database'
+        return None, None
+
+    def get_or_generate(self, user_data, generate):
+        """Return (plan, hit) where hit is 'memory', 'database' or None"""
+        plan, hit = self.lookup(user_data)
+        if plan is not None:
+            return plan, hit
+
+        profile = self.profile_key(user_data)
+        key = self.cache_key(profile)
+        now = datetime.utcnow()
+        started = time.monotonic()
+        plan = generate(user_data)
+        self._count('misses', generation_seconds=time.monotonic() - started)
+
+        db.session.execute(
+            pg_insert(AIResponseCache).values(
+                cache_key=key,
+                namespace=self.NAMESPACE,
+                request_key=profile,
+                response=plan,
+                hit_count=0,
+                created_at=now,
+                last_hit_at=now
+            ).on_conflict_do_update(
+                index_elements=['cache_key'],
+                set_={'response': plan, 'created_at': now, 'last_hit_at': now}
+            )
+        )
+        self.memory.set(key, plan)
+        self._maybe_evict(now)
+        return plan, None
+
+    def raw_stats(self):
+        """The underlying counters, which can be summed across processes"""
+        with self._lock:
+            return dict(self._stats)
+
+    def stats(self, others=()):
+        """Hit counts plus the model time the hits are estimated to have saved.
+
+        others are raw_stats() from other processes (e.g. the generation
+        worker, which is where diet plans are generated) to fold in.
+        """
+        stats = self.raw_stats()
+        for other in others:
+            for field in stats:
+                stats[field] += other.get(field, 0)
+        hits = stats['memory_hits'] + stats['database_hits']
+        lookups = hits + stats['misses']
+        average = stats['generation_seconds'] / stats['misses'] if stats['misses'] else 0.0
+        return {
+            'memory_hits': stats['memory_hits'],
+            'database_hits': stats['database_hits'],
+            'misses': stats['misses'],
+            'hit_ratio': hits / lookups if lookups else 0.0,
+            'average_generation_seconds': average,
+            'estimated_seconds_saved': hits * average
+        }
+
+    def _count(self, field, generation_seconds=0.0):
+        with self._lock:
+            self._stats[field] += 1
+            self._stats['generation_seconds'] += generation_seconds
+
+    def _maybe_evict(self, now):
+        with self._lock:
+            self._writes += 1
+            if self._writes % self.evict_every:
+                return
+
+        namespace = AIResponseCache.namespace == self.NAMESPACE
+        AIResponseCache.query.filter(namespace, AIResponseCache.created_at < now - self.ttl)\
+            .delete(synchronize_session=False)
+
+        # Keep only the most recently hit rows once the tier is over budget
+        cutoff = db.session.query(AIResponseCache.last_hit_at).filter(namespace)\
+            .order_by(AIResponseCache.last_hit_at.desc())\
+            .offset(self.max_rows).limit(1).scalar()
+        if cutoff is not None:
+            AIResponseCache.query.filter(namespace, AIResponseCache.last_hit_at <= cutoff)\
+                .delete(synchronize_session=False)
+
+
+diet_plan_cache = DietPlanCache()
+
+
+STOPWORDS = frozenset("""
+    a an and are as at be but by can could do does for from how i if in into is it its me my of on or
+    please should so tell than that the their them there these this to was what when where which who why
+    will with would you your
+""".split())
+
+
+class ChatAnswerCache:
+    """In-process answer cache for repeated chatbot questions.
+
+    Questions are reduced to a fingerprint (case folded, punctuation and
+    stopwords dropped, remaining tokens sorted) so trivial rephrasings share
+    an answer. The cache is seeded from recent ChatbotQuery rows on first use.
+    """
+
+    def __init__(self):
+        self.ttl = timedelta(hours=int(os.getenv('CHAT_CACHE_TTL_HOURS', 24)))
+        self.memory = LRUCache(
+            max_size=int(os.getenv('CHAT_CACHE_SIZE', 1000)),
+            ttl_seconds=self.ttl.total_seconds()
+        )
+        self._seed_lock = threading.Lock()
+        self._seeded = False
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def fingerprint(question):
+        words = ''.join(ch if ch.isalnum() else ' ' for ch in (question or '').casefold()).split()
+        tokens = sorted({word for word in words if word not in STOPWORDS})
+        if not tokens:
+            return None
+        return hashlib.sha1(' '.join(tokens).encode('utf-8')).hexdigest()
+
+    def get(self, question):
+        self._seed()
+        key = self.fingerprint(question)
+        answer = self.memory.get(key) if key else None
+        with self._stats_lock:
+            if answer is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return answer
+
+    def set(self, question, answer):
+        key = self.fingerprint(question)
+        if key and answer:
+            self.memory.set(key, answer)
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self._hits, self._misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+            'entries': len(self.memory)
+        }
+
+    def _seed(self):
+        if self._seeded:
+            return
+        with self._seed_lock:
+            if self._seeded:
+                return
+            from app.models.chatbot_query import ChatbotQuery
+
+            recent = ChatbotQuery.query.with_entities(ChatbotQuery.question, ChatbotQuery.answer)\
+                .filter(
+                    ChatbotQuery.query_type == 'diet',
+                    ChatbotQuery.answer.isnot(None),
+                    # Threaded answers may lean on earlier turns, so they never seed the shared cache
+                    ChatbotQuery.thread_id.is_(None),
+                    ChatbotQuery.created_at >= datetime.utcnow() - self.ttl
+                )\
+                .order_by(ChatbotQuery.created_at.desc())\
+                .limit(self.memory.max_size)\
+                .all()
+            # Oldest first so the newest answers end up most recently used
+            for question, answer in reversed(recent):
+                self.set(question, answer)
+            self._seeded = True
+
+
+chat_answer_cache = ChatAnswerCache()
@@ -0,0 +1,141 @@
+import os
+from datetime import timedelta
+from sqlalchemy import event, text, bindparam
+from sqlalchemy.orm import Session
+from app import db
+from app.models.challenge import UserChallenge
+from app.services.response_cache import LRUCache
+
+# Gaps-and-islands: consecutive dates share the same (date - row_number) value
+_ISLANDS_SQL = """
+    WITH islands AS (
+        SELECT {key} AS streak_key, progress_date,
+               progress_date - CAST(ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY progress_date) AS INTEGER) AS grp
+        FROM ({source}) AS days
+    ), runs AS (
+        SELECT streak_key, COUNT(*) AS length, MAX(progress_date) AS run_end
+        FROM islands
+        GROUP BY streak_key, grp
+    )
+    SELECT streak_key,
+           MAX(length) AS longest_streak,
+           (ARRAY_AGG(length ORDER BY run_end DESC))[1] AS current_streak,
+           MAX(run_end) AS last_progress_date
+    FROM runs
+    GROUP BY streak_key
+"""
+
+_PER_CHALLENGE_SQL = text(_ISLANDS_SQL.format(
+    key='user_challenge_id',
+    source='SELECT user_challenge_id, progress_date FROM challenge_progress WHERE user_challenge_id IN :ids'
+)).bindparams(bindparam('ids', expanding=True))
+
+_OVERALL_SQL = text(_ISLANDS_SQL.format(
+    key='user_id',
+    source='SELECT DISTINCT uc.user_id, cp.progress_date '
+           'FROM challenge_progress cp JOIN user_challenges uc ON uc.id = cp.user_challenge_id '
+           'WHERE uc.user_id = :user_id'
+))
+
+
+class StreakService:
+    """Current and longest streaks over daily ChallengeProgress rows.
+
+    Per-challenge streaks are cached on UserChallenge and advanced in place by
+    mark_progress; the window-function query is only needed to (re)build them.
+    The overall streak is cached per user in a bounded in-process LRU. A mark
+    clears it in the process that handled the mark; other processes pick it up
+    once the entry expires after refresh_seconds.
+    """
+
+    def __init__(self, refresh_seconds=None, max_users=None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else \
+            int(os.getenv('STREAK_REFRESH_SECONDS', 60))
+        self._overall = LRUCache(
+            max_size=max_users or int(os.getenv('STREAK_CACHE_SIZE', 10000)),
+            ttl_seconds=self.refresh_seconds
+        )
+
+    @staticmethod
+    def advance_values(today):
+        """UPDATE values that extend the cached streak when today's row is inserted"""
+        current = db.case(
+            (UserChallenge.last_progress_date == today - timedelta(days=1), UserChallenge.current_streak + 1),
+            (UserChallenge.last_progress_date == today, UserChallenge.current_streak),
+            else_=1
+        )
+        return {
+            'current_streak': current,
+            'longest_streak': db.func.greatest(UserChallenge.longest_streak, current),
+            'last_progress_date': today
+        }
+
+    @staticmethod
+    def effective_current(current_streak, last_progress_date, today):
+        """A streak is still alive if progress was marked today or yesterday"""
+        if not last_progress_date or last_progress_date < today - timedelta(days=1):
+            return 0
+        return current_streak or 0
+
+    def recompute(self, user_challenge_ids):
+        """Rebuild cached streak columns from history for the given user challenges"""
+        user_challenge_ids = list(user_challenge_ids)
+        if not user_challenge_ids:
+            return 0
+
+        rows = db.session.execute(_PER_CHALLENGE_SQL, {'ids': user_challenge_ids}).all()
+        found = {row.streak_key for row in rows}
+        updates = [{
+            'id': row.streak_key,
+            'current_streak': row.current_streak,
+            'longest_streak': row.longest_streak,
+            'last_progress_date': row.last_progress_date
+        } for row in rows]
+        updates.extend({
+            'id': user_challenge_id,
+            'current_streak': 0,
+            'longest_streak': 0,
+            'last_progress_date': None
+        } for user_challenge_id in user_challenge_ids if user_challenge_id not in found)
+
+        db.session.execute(db.update(UserChallenge), updates)
+        return len(updates)
+
+    def overall(self, user_id, today):
+        """Return (current, longest) across all of a user's challenges"""
+        user_id = int(user_id)
+        cached = self._overall.get(user_id)
+        if cached is None:
+            row = db.session.execute(_OVERALL_SQL, {'user_id': user_id}).first()
+            cached = (row.current_streak, row.longest_streak, row.last_progress_date) if row else (0, 0, None)
+            self._overall.set(user_id, cached)
+
+        current_streak, longest_streak, last_progress_date = cached
+        return self.effective_current(current_streak, last_progress_date, today), longest_streak
+
+    def invalidate_user(self, user_id):
+        """Forget a user's overall streak once the session commits"""
+        db.session.info.setdefault(_PENDING_KEY, set()).add(int(user_id))
+
+    def _forget(self, user_ids):
+        for user_id in user_ids:
+            self._overall.discard(user_id)
+
+
+streaks = StreakService()
+
+_PENDING_KEY = 'streak_pending_users'
+
+
+def _forget_after_commit(session):
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if user_ids:
+        streaks._forget(user_ids)
+
+
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(Session, 'after_commit', _forget_after_commit)
+event.listen(Session, 'after_rollback', _discard_after_rollback)
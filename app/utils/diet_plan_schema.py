@@ -0,0 +1,127 @@
+import json
+import re
+
+MACROS = ('calories', 'protein_g', 'carbs_g', 'fat_g')
+
+# Shown to the model so it returns exactly what parse_diet_plan accepts
+SCHEMA_EXAMPLE = """{
+  "meals": [
+    {
+      "name": "Breakfast",
+      "items": [
+        {"name": "Oatmeal with berries", "quantity": "1 bowl", "calories": 320, "protein_g": 10, "carbs_g": 54, "fat_g": 6}
+      ]
+    }
+  ],
+  "notes": "One or two sentences of guidance"
+}"""
+
+
+class DietPlanFormatError(ValueError):
+    """The model's output does not match the diet plan schema"""
+
+
+def _number(value, field):
+    if isinstance(value, bool):
+        raise DietPlanFormatError(f'{field} must be a number')
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        match = re.search(r'-?\d+(?:\.\d+)?', value)
+        if not match:
+            raise DietPlanFormatError(f'{field} must be a number')
+        number = float(match.group())
+    elif value is None:
+        return 0.0
+    else:
+        raise DietPlanFormatError(f'{field} must be a number')
+    if number < 0:
+        raise DietPlanFormatError(f'{field} cannot be negative')
+    return number
+
+
+def _round(value):
+    return int(round(value)) if float(value).is_integer() else round(value, 1)
+
+
+def _extract_object(text):
+    text = (text or '').strip()
+    # Tolerate markdown fences and leading chatter around the JSON object
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end < start:
+        raise DietPlanFormatError('No JSON object in model output')
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise DietPlanFormatError(f'Invalid JSON: {e}')
+
+
+def parse_diet_plan(text):
+    """Validate model output and return the compact structured plan"""
+    return normalize_diet_plan(_extract_object(text))
+
+
+def normalize_diet_plan(data):
+    """Validate an already decoded plan (model output or a client edit) and return its compact form.
+
+    Unknown keys are dropped, numbers are coerced ("320 kcal" -> 320), and meal
+    and daily totals are recomputed from the items so they are always
+    consistent.
+    """
+    meals = data.get('meals') if isinstance(data, dict) else None
+    if not isinstance(meals, list) or not meals:
+        raise DietPlanFormatError('meals must be a non-empty list')
+
+    compact_meals = []
+    totals = dict.fromkeys(MACROS, 0.0)
+    for meal_index, meal in enumerate(meals):
+        if not isinstance(meal, dict) or not str(meal.get('name') or '').strip():
+            raise DietPlanFormatError(f'meals[{meal_index}] needs a name')
+        items = meal.get('items')
+        if not isinstance(items, list) or not items:
+            raise DietPlanFormatError(f'meals[{meal_index}].items must be a non-empty list')
+
+        compact_items = []
+        meal_totals = dict.fromkeys(MACROS, 0.0)
+        for item_index, item in enumerate(items):
+            if not isinstance(item, dict) or not str(item.get('name') or '').strip():
+                raise DietPlanFormatError(f'meals[{meal_index}].items[{item_index}] needs a name')
+            compact_item = {'name': str(item['name']).strip()}
+            if item.get('quantity'):
+                compact_item['quantity'] = str(item['quantity']).strip()
+            for macro in MACROS:
+                value = _number(item.get(macro), f'meals[{meal_index}].items[{item_index}].{macro}')
+                compact_item[macro] = _round(value)
+                meal_totals[macro] += value
+            compact_items.append(compact_item)
+
+        compact_meals.append({
+            'name': str(meal['name']).strip(),
+            'items': compact_items,
+            **{macro: _round(meal_totals[macro]) for macro in MACROS}
+        })
+        for macro in MACROS:
+            totals[macro] += meal_totals[macro]
+
+    if totals['calories'] <= 0:
+        raise DietPlanFormatError('Plan has no calories')
+
+    plan = {
+        'meals': compact_meals,
+        'totals': {macro: _round(totals[macro]) for macro in MACROS}
+    }
+    notes = data.get('notes')
+    if isinstance(notes, str) and notes.strip():
+        plan['notes'] = notes.strip()
+    return plan
+
+
+def totals_columns(plan):
+    """DietPlan column values for a normalized plan's daily totals"""
+    totals = plan['totals']
+    return {
+        'total_calories': int(round(totals['calories'])),
+        'protein_g': totals['protein_g'],
+        'carbs_g': totals['carbs_g'],
+        'fat_g': totals['fat_g']
+    }
@@ -0,0 +1,89 @@
+import json
+
+_WHITESPACE = ' \t\r\n'
+
+
+class JSONArrayStream:
+    """Incrementally parse a JSON array of objects as text arrives in chunks.
+
+    feed() returns the elements completed by that chunk, so callers can act on
+    the first objects before the rest of the array has been produced. Text
+    before the opening bracket (chatter, markdown fences) is ignored; only a
+    bracket followed by an object opens the array, so a preamble such as
+    "Here are [5] challenges:" is skipped too. Each element is decoded once
+    it closes, and consumed text is dropped, so the buffer stays about one
+    element long.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._started = False
+        self._scan_from = 0
+        self.done = False
+
+    def feed(self, chunk):
+        if self.done or not chunk:
+            return []
+        self._buffer += chunk
+        while not self._started:
+            start = self._buffer.find('[')
+            if start == -1:
+                self._buffer = ''
+                return []
+            following = self._buffer[start + 1:].lstrip(_WHITESPACE)
+            if not following:
+                # Whether this bracket opens the array depends on text not seen yet
+                self._buffer = self._buffer[start:]
+                return []
+            self._buffer = self._buffer[start + 1:]
+            self._started = following[0] == '{'
+        return self._drain()
+
+    def close(self):
+        """Finish the stream; raise ValueError if the array never closed cleanly"""
+        if not self._started:
+            raise ValueError('No JSON array of objects in stream')
+        if not self.done:
+            raise ValueError('JSON array was not terminated')
+
+    def _drain(self):
+        items = []
+        while True:
+            buffer = self._buffer.lstrip(_WHITESPACE + ',')
+            if buffer != self._buffer:
+                self._scan_from = max(0, self._scan_from - (len(self._buffer) - len(buffer)))
+                self._buffer = buffer
+            if not buffer:
+                return items
+            if buffer[0] == ']':
+                self.done = True
+                self._buffer = ''
+                return items
+
+            # Objects and arrays can only be complete once a closing bracket has arrived
+            if buffer[0] in '{[':
+                closing = '}' if buffer[0] == '{' else ']'
+                if buffer.find(closing, self._scan_from) == -1:
+                    self._scan_from = len(buffer)
+                    return items
+            try:
+                item, end = self._decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # Incomplete element (or a closing bracket inside a string); wait for more text
+                self._scan_from = len(buffer)
+                return items
+            if end == len(buffer) and buffer[0] not in '{["':
+                # A bare number or literal may continue in the next chunk
+                return items
+            items.append(item)
+            self._buffer = buffer[end:]
+            self._scan_from = 0
+
+
+def parse_json_array(text):
+    """Parse the first JSON array of objects in text, ignoring anything around it"""
+    stream = JSONArrayStream()
+    items = stream.feed(text)
+    stream.close()
+    return items
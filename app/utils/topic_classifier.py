@@ -0,0 +1,106 @@
+import re
+
+# Matched as word prefixes: "calori" covers calorie, calories, caloric. Only stems that
+# no common unrelated word starts with belong here; the rest go in DIET_WORDS.
+DIET_STEMS = """
+    diet nutri nourish food meal snack breakfast brunch lunch dinner supper dessert recipe ingredient
+    baking roast saute marinat portion
+    calori kcal kilocal macronutri micronutri protein carbohydrat lipid sugar sweeten glucose
+    fructose lactose gluten starch cholesterol triglycerid sodium potassium calcium magnesium zinc
+    iodine folate folic vitamin electrolyt antioxid probiotic prebiotic
+    creatine collagen whey casein amino bcaa keto ketogen vegan vegetarian pescatar carnivor
+    fasting detox appetit hungry craving satiet
+    digesti metabol glycem insulin hydrat dehydrat drink beverage smoothie juice
+    coffee caffein soda alcohol beer wine milk dairy cheese yogurt yoghurt
+    egg meat beef pork chicken mutton salmon sardine shrimp seafood
+    tofu tempeh seitan paneer lentil chickpea legume hummus quinoa oatmeal
+    porridge cereal granola muesli wheat bread pasta noodle tortilla potato
+    vegetable veggie salad spinach broccoli carrot tomato cucumber avocado mushroom
+    banana berry berries strawberr blueberr mango pineapple papaya
+    almond walnut cashew peanut pistachio flax sesame
+    ghee chocolate cocoa jaggery syrup turmeric garlic cinnamon
+    biscuit cake pastry candy burger pizza sandwich soup
+    takeout restaurant grocer groceri mealprep nutritionist dietitian dietician
+    obes overweight underweight bmi bodyfat
+    anemi anaemi diabet hypertens allerg intoleran celiac coeliac reflux constipat
+"""
+
+# Matched as whole words only, because as prefixes they would catch unrelated words
+# ("fat" must not match "fatigue", "stew" must not match "stewardship", "lamb" must
+# not match "lambda", "boil" must not match "boilerplate"). Terms that are mostly
+# used off topic even as whole words (steam, serving, hunger, apple, cup, kg, turkey,
+# orange, deficit, surplus, intermittent, mediterranean) are left out entirely.
+DIET_WORDS = """
+    eat eats eating eaten ate fat fats fatty tea teas pea peas corn rye soy dal rice egg eggs ham
+    jam nut nuts oil oils pie pies fig figs yam yams gram grams ounce ounces
+    iron mg mcg bulking cook cooks cooked cooking shake shakes steamed servings apples
+    honey butter water carb carbs macro macros oat oats seed seeds fish
+    bake baked bakes fry fried fries frying grill grilled grilling boil boiled boiling boils
+    fiber fibers fibre fibres salt salts salted salty mineral minerals omega supplement supplements
+    paleo cleanse bloat bloated bloating matcha cream creamy lamb tuna bean beans kale
+    fruit fruits oranges grape grapes grapefruit chia olive olives sauce sauces ginger
+    chips wrap wraps stew stews stewed curry curries ibs grain grains
+"""
+
+
+def _build_trie(stems, words):
+    trie = {}
+    for term, kind in [(stem, '*') for stem in stems] + [(word, '') for word in words]:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        # '*' accepts any continuation; '' requires a word boundary
+        node[kind] = True
+    return trie
+
+
+def _trie_pattern(node):
+    if '*' in node:
+        # A prefix stem ends here, so anything longer is already accepted
+        return ''
+    alternatives = []
+    for char in sorted(key for key in node if key not in ('', '*')):
+        alternatives.append(re.escape(char) + _trie_pattern(node[char]))
+    if '' in node:
+        alternatives.append(r'\b')
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return '(?:' + '|'.join(alternatives) + ')'
+
+
+class TopicClassifier:
+    """Decides whether a question is on topic with one precompiled regex trie.
+
+    The vocabulary is folded into a character trie and emitted as a single
+    regular expression, so classification is one scan of the lowercased
+    question no matter how many terms there are. Terms must follow a
+    non-alphanumeric character; a leading space is prepended so the first
+    word qualifies. This is cheaper than a \\b assertion, which stops the
+    regex engine from skipping ahead to candidate positions.
+    """
+
+    def __init__(self, stems, words=()):
+        self.stems = frozenset(stem.lower() for stem in stems)
+        self.words = frozenset(word.lower() for word in words)
+        trie = _build_trie(sorted(self.stems), sorted(self.words))
+        self.pattern = re.compile('[^a-z0-9](' + _trie_pattern(trie) + ')')
+        self._search = self.pattern.search
+
+    def matches(self, text):
+        return self._search(' ' + text.lower()) is not None
+
+    def first_match(self, text):
+        """The first matching term (or term prefix), for diagnostics"""
+        match = self._search(' ' + text.lower())
+        return match.group(1) if match else None
+
+    def __len__(self):
+        return len(self.stems) + len(self.words)
+
+
+# Built once at import; every request reuses the compiled pattern
+diet_topics = TopicClassifier(DIET_STEMS.split(), DIET_WORDS.split())
+
+
+def is_diet_question(question):
+    return diet_topics.matches(question)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Measure create_app() startup time and whether the Gemini SDK gets imported
+
+Each run happens in a fresh interpreter. --eager imports google.generativeai
+before create_app() to reproduce the old per-blueprint behaviour.
+
+Usage: python benchmark_startup.py [--runs 10] [--eager]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+if {eager}:
+    import google.generativeai
+from app import create_app
+create_app()
+elapsed = time.perf_counter() - started
+print(f"{{elapsed:.6f}} {{int('google.generativeai' in sys.modules)}}")
+"""
+
+
+def run_once(eager):
+    env = dict(os.environ)
+    env.setdefault('JWT_SECRET_KEY', 'benchmark-jwt-secret-key-not-for-production')
+    env.setdefault('SECRET_KEY', 'benchmark-secret-key-not-for-production')
+    env.setdefault('DATABASE_URL', 'postgresql://localhost/benchmark')
+
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(eager=eager)],
+        capture_output=True, text=True, check=True, env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    ).stdout.strip().splitlines()[-1]
+    elapsed, sdk_loaded = output.split()
+    return float(elapsed), sdk_loaded == '1'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--eager', action='store_true', help='import the Gemini SDK up front')
+    args = parser.parse_args()
+
+    timings = []
+    sdk_loaded = False
+    for _ in range(args.runs):
+        elapsed, sdk_loaded = run_once(args.eager)
+        timings.append(elapsed)
+
+    print("\n" + "="*70)
+    print(f"  ⏱️  create_app() STARTUP ({'eager' if args.eager else 'lazy'} Gemini SDK)")
+    print("="*70)
+    print(f"Runs:    {args.runs}")
+    print(f"Median:  {statistics.median(timings) * 1000:.1f} ms")
+    print(f"Min:     {min(timings) * 1000:.1f} ms")
+    print(f"Max:     {max(timings) * 1000:.1f} ms")
+    print(f"SDK imported at startup: {'yes' if sdk_loaded else 'no'}")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
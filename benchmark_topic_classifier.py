@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Measure chatbot topic classification cost per question
+
+Compares the precompiled regex trie in app/utils/topic_classifier.py with
+the substring scan over 12 keywords it replaced, on a fixed set of on- and
+off-topic questions. It also lists questions the two disagree on.
+
+Usage: python benchmark_topic_classifier.py [--rounds 20000]
+"""
+
+import argparse
+import time
+
+from app.utils.topic_classifier import diet_topics
+
+LEGACY_KEYWORDS = ['diet', 'food', 'meal', 'nutrition', 'calorie', 'protein',
+                   'carb', 'fat', 'vitamin', 'eat', 'recipe', 'ingredient']
+
+ON_TOPIC = [
+    'How much protein should I eat per day?',
+    'Is rice a good carb source for weight loss?',
+    'What should I have for breakfast before a morning run?',
+    'Which foods are high in vitamin D?',
+    'How many calories are in a banana?',
+    'Give me a high protein vegetarian dinner idea',
+    'Is intermittent fasting safe for diabetics?',
+    'Can I drink coffee on a keto plan?',
+    'Are almonds or walnuts better as a snack?',
+    'How much water should I drink when it is hot?',
+    'Is paneer a good source of calcium?',
+    'What can I cook with lentils and spinach?',
+    'Should I take a whey or casein shake after training?',
+    'Why do I get bloated after milk?',
+    'Is oatmeal okay if I have high cholesterol?',
+    'What is a healthy portion of pasta?',
+    'How do I stop sugar cravings at night?',
+    'Are eggs bad for my heart?',
+    'How do I stop feeling hungry at night?',
+    'Are steamed vegetables as healthy as raw ones?',
+    'How many carbs are in a cup of rice?',
+    # Known misses: these words were dropped because they mostly appear off topic
+    'Are cookies bad for weight loss?',
+    'Is an apple a day really healthy?'
+]
+
+OFF_TOPIC = [
+    "What's the best running shoe for flat feet?",
+    'How do I fix my laptop screen brightness?',
+    'I feel fatigue after the gym, is that normal?',
+    'Can you recommend a good team sport for adults?',
+    'How many sets of squats should I do?',
+    'What time does the gym open on Sunday?',
+    'How do I reset my password?',
+    'Is it better to stretch before or after a workout?',
+    'Write me a poem about the ocean',
+    'Who won the football match yesterday?',
+    # Food words used in other senses; each once slipped through as a prefix or bare word
+    'how to clear browser cookies',
+    'Is Shakespeare worth reading?',
+    'best steam games',
+    'tips for serving in tennis',
+    'hunger games sequel',
+    'stock price of Apple',
+    'Who won the world cup?',
+    'How many kg should I squat?',
+    'Where should we go on our honeymoon?',
+    'How do I improve my butterfly stroke?',
+    'Is my watch waterproof?',
+    'My carburetor is leaking',
+    'Who is the top seeded player?',
+    'Tickets for the super bowl',
+    'Best fishing spots nearby',
+    "Reader's digest subscription",
+    'Explain it in a nutshell'
+]
+
+
+def legacy_matches(question):
+    lowered = question.lower()
+    return any(keyword in lowered for keyword in LEGACY_KEYWORDS)
+
+
+def time_per_question(classify, questions, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for question in questions:
+            classify(question)
+    return (time.perf_counter() - started) / (rounds * len(questions)) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=20000)
+    args = parser.parse_args()
+
+    questions = ON_TOPIC + OFF_TOPIC
+    # Warm up caches and the allocator before timing
+    time_per_question(diet_topics.matches, questions, 100)
+    time_per_question(legacy_matches, questions, 100)
+
+    print("\n" + "="*70)
+    print(f"  🔎 TOPIC CLASSIFIER BENCHMARK ({len(diet_topics)} terms, {args.rounds} rounds)")
+    print("="*70)
+    print(f"{'classifier':<14}{'all ns':>10}{'on ns':>10}{'off ns':>10}{'accuracy':>11}")
+    for name, classify in (('regex trie', diet_topics.matches), ('legacy scan', legacy_matches)):
+        correct = sum(classify(q) for q in ON_TOPIC) + sum(not classify(q) for q in OFF_TOPIC)
+        print(f"{name:<14}"
+              f"{time_per_question(classify, questions, args.rounds):>10.0f}"
+              f"{time_per_question(classify, ON_TOPIC, args.rounds):>10.0f}"
+              f"{time_per_question(classify, OFF_TOPIC, args.rounds):>10.0f}"
+              f"{correct / len(questions):>10.0%}")
+
+    print("-"*70)
+    for question in questions:
+        new, old = diet_topics.matches(question), legacy_matches(question)
+        if new != old:
+            expected = question in ON_TOPIC
+            print(f"{'✓' if new == expected else '✗'} trie={'on' if new else 'off':<3} legacy={'on' if old else 'off':<3} "
+                  f"{question} [{diet_topics.first_match(question) or '-'}]")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
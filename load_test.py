@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Drive the AI endpoints concurrently and report latency percentiles and throughput
+
+Start the API and worker with GEMINI_BACKEND=fake (and optionally
+FAKE_GEMINI_PROFILE=fast|realistic|flaky) to load-test without spending quota.
+Queued endpoints are timed end to end: enqueue plus polling the job to completion.
+A job still unfinished after --job-timeout seconds counts as an error.
+
+Usage: python load_test.py --email user@example.com --password secret \
+           [--base-url http://localhost:5000] [--endpoints chatbot,diet,challenges] \
+           [--concurrency 20] [--requests 200] [--job-timeout 300]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+QUESTIONS = [
+    'How much protein should I eat per day?',
+    'Is rice a good carb source for weight loss?',
+    'What should I eat before a morning workout?',
+    'Which foods are high in vitamin D?',
+    'How many calories are in a banana?',
+    'Give me a healthy high protein vegetarian meal idea'
+]
+
+DIET_PROFILE = {
+    'age': 28, 'gender': 'female', 'weight': 62, 'height': 165,
+    'activity_level': 'moderate', 'goal': 'weight_loss', 'diet_type': 'vegetarian'
+}
+
+CHALLENGE_PROFILE = {'age': 30, 'gender': 'male', 'activity_level': 'active', 'goal': 'Strength'}
+
+
+class Client:
+    def __init__(self, base_url, token=None, timeout=120, job_timeout=300):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self.job_timeout = job_timeout
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        request.add_header('Content-Type', 'application/json')
+        if self.token:
+            request.add_header('Authorization', f'Bearer {self.token}')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+
+def chatbot(client, rng):
+    status, _ = client.request('POST', '/api/chatbot/query', {'question': rng.choice(QUESTIONS)})
+    return status == 201
+
+
+def run_job(client, path, body, poll_interval=0.2):
+    status, payload = client.request('POST', path, body)
+    if status == 201:
+        return True
+    if status != 202:
+        return False
+    job_path = f"/api/jobs/{payload['job_id']}"
+    # A job lost by the worker would otherwise keep this thread polling forever
+    deadline = time.monotonic() + client.job_timeout
+    while time.monotonic() < deadline:
+        status, job = client.request('GET', job_path)
+        if status != 200:
+            return False
+        if job['status'] in ('succeeded', 'failed'):
+            return job['status'] == 'succeeded'
+        time.sleep(poll_interval)
+    return False
+
+
+def diet(client, rng):
+    profile = dict(DIET_PROFILE, weight=DIET_PROFILE['weight'] + rng.randint(-5, 5))
+    return run_job(client, '/api/diet/generate', profile)
+
+
+def challenges(client, rng):
+    # Cohorts with a fresh pool answer synchronously with 201
+    return run_job(client, '/api/challenges/generate', CHALLENGE_PROFILE)
+
+
+SCENARIOS = {'chatbot': chatbot, 'diet': diet, 'challenges': challenges}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--endpoints', default='chatbot,diet,challenges')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--job-timeout', type=float, default=300,
+                        help='seconds to poll a queued job before counting it as an error')
+    args = parser.parse_args()
+
+    endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = set(endpoints) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    status, payload = Client(args.base_url).request('POST', '/api/auth/login', {
+        'email': args.email, 'password': args.password
+    })
+    if status != 200:
+        raise SystemExit(f'❌ Login failed with HTTP {status}')
+    client = Client(args.base_url, token=payload['access_token'], job_timeout=args.job_timeout)
+
+    results = {name: [] for name in endpoints}
+    lock = threading.Lock()
+
+    def one(index):
+        rng = random.Random(args.seed + index)
+        name = endpoints[index % len(endpoints)]
+        started = time.perf_counter()
+        try:
+            ok = SCENARIOS[name](client, rng)
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            results[name].append((elapsed, ok))
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - wall_started
+
+    print("\n" + "="*70)
+    print(f"  📈 AI ENDPOINT LOAD TEST ({args.requests} requests, concurrency {args.concurrency})")
+    print("="*70)
+    print(f"{'endpoint':<12}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for name, samples in results.items():
+        if not samples:
+            continue
+        latencies = [elapsed * 1000 for elapsed, _ in samples]
+        errors = sum(1 for _, ok in samples if not ok)
+        print(f"{name:<12}{len(samples):>7}{errors:>8}"
+              f"{percentile(latencies, 50):>10.0f}{percentile(latencies, 95):>10.0f}{percentile(latencies, 99):>10.0f}"
+              f"{len(samples) / wall:>9.1f}")
+    all_latencies = [elapsed * 1000 for samples in results.values() for elapsed, _ in samples]
+    print("-"*70)
+    print(f"Wall time: {wall:.1f}s   Throughput: {len(all_latencies) / wall:.1f} req/s   "
+          f"Mean: {statistics.mean(all_latencies):.0f} ms")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Precompute challenge suggestion pools for every cohort (goal x activity level x age band)
+
+Run from cron or a scheduler ahead of the pool TTL so /api/challenges/generate
+can answer from the pool without calling the model.
+
+Usage: python precompute_challenge_pools.py [--all] [--limit N] [--dry-run]
+"""
+
+from dotenv import load_dotenv
+import argparse
+import time
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--all', action='store_true', help='regenerate fresh pools too, not only missing or stale ones')
+    parser.add_argument('--limit', type=int, default=None, help='stop after this many cohorts')
+    parser.add_argument('--dry-run', action='store_true', help='list the cohorts that would be generated')
+    args = parser.parse_args()
+
+    from app import create_app, db
+    from app.services import challenge_pool
+    from app.services.gemini_service import get_gemini
+
+    app = create_app()
+    with app.app_context():
+        cohorts = list(challenge_pool.all_cohorts())
+        todo = cohorts if args.all else challenge_pool.stale_cohorts(cohorts)
+        if args.limit is not None:
+            todo = todo[:args.limit]
+
+        print("\n" + "="*70)
+        print("  🏊 CHALLENGE POOL PRECOMPUTE")
+        print("="*70)
+        print(f"📋 {len(cohorts)} cohorts, {len(todo)} to generate")
+        print("="*70 + "\n")
+
+        if args.dry_run:
+            for cohort in todo:
+                print(f"   • {challenge_pool.cohort_key(cohort)}")
+            return
+
+        stored = failed = 0
+        started = time.monotonic()
+        for cohort in todo:
+            key = challenge_pool.cohort_key(cohort)
+            try:
+                suggestions = get_gemini().suggest_challenges(challenge_pool.cohort_profile(cohort))
+                # Fallback defaults are not stored, so the cohort is retried next run
+                if not challenge_pool.store_pool(cohort, suggestions):
+                    failed += 1
+                    print(f"✗ {key}: model unavailable, left for the next run")
+                else:
+                    stored += 1
+                    print(f"✓ {key}: {len(suggestions)} suggestions")
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                failed += 1
+                print(f"✗ {key}: {e}")
+
+        print(f"\n✅ Stored {stored} pool(s), {failed} failed, in {time.monotonic() - started:.1f}s\n")
+
+
+if __name__ == '__main__':
+    main()
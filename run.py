@@ -17,6 +17,7 @@ def index():
         'status': 'running',
         'endpoints': {
             'health': '/health',
+            'ai_metrics': '/health/ai',
             'docs': '/api/docs',
             'auth': '/api/auth',
             'users': '/api/users',
@@ -24,7 +25,8 @@ def index():
             'workouts': '/api/workouts',
             'diet': '/api/diet',
             'exercise': '/api/exercise',
-            'chatbot': '/api/chatbot'
+            'chatbot': '/api/chatbot',
+            'jobs': '/api/jobs'
         }
     })
 
@@ -48,22 +50,31 @@ def docs():
                 'GET /auth/verify': 'Verify JWT token'
             },
             'Diet Plans': {
-                'POST /diet/generate': 'Generate AI diet plan',
-                'GET /diet/': 'Get all user diet plans',
+                'POST /diet/generate': 'Queue AI diet plan generation (202 + job id)',
+                'GET /diet/': 'Get user diet plan summaries (?include_plan=true for full plans)',
                 'GET /diet/<id>': 'Get specific diet plan',
                 'PUT /diet/<id>': 'Update diet plan',
                 'DELETE /diet/<id>': 'Delete diet plan',
                 'GET /diet/latest': 'Get latest diet plan',
                 'GET /diet/statistics': 'Get diet statistics'
             },
+            'Jobs': {
+                'GET /jobs/<id>': 'Get status and result of an AI generation job'
+            },
             'Chatbot': {
-                'POST /chatbot/query': 'Send question to AI',
+                'POST /chatbot/query': 'Send question to AI (optional thread_id for follow-ups)',
+                'POST /chatbot/query/stream': 'Send question to AI, stream answer as server-sent events',
+                'POST /chatbot/threads': 'Start a conversation thread',
+                'GET /chatbot/threads': 'List conversation threads',
+                'GET /chatbot/threads/<id>': 'Get thread with its turns',
+                'DELETE /chatbot/threads/<id>': 'Delete thread',
                 'GET /chatbot/history': 'Get chat history',
                 'GET /chatbot/<id>': 'Get specific query',
                 'DELETE /chatbot/<id>': 'Delete query',
                 'DELETE /chatbot/history': 'Clear history',
                 'GET /chatbot/statistics': 'Get chat statistics',
-                'POST /chatbot/quick-ask': 'Quick ask without saving'
+                'POST /chatbot/quick-ask': 'Quick ask without saving',
+                'POST /chatbot/<id>/faq': 'Mark or unmark an answer as a curated FAQ (Admin only)'
             },
             'Yoga': {
                 'GET /yoga/': 'Get all yoga poses',
@@ -101,21 +112,60 @@ def docs():
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
+    from app.services.gemini_service import router
+
     try:
         # Test database connection
         db.session.execute(db.text('SELECT 1'))
         return jsonify({
             'status': 'healthy',
             'database': 'connected',
-            'api': 'running'
+            'api': 'running',
+            'ai': router.snapshot()
         }), 200
     except Exception as e:
         return jsonify({
             'status': 'unhealthy',
             'database': 'disconnected',
+            'ai': router.snapshot(),
             'error': str(e)
         }), 500
 
+@app.route('/health/ai')
+def ai_health_check():
+    """AI call metrics for this process plus those published by generation workers"""
+    from app.services.ai_metrics import AIMetrics, metrics, published_snapshots
+    from app.services.gemini_service import router
+    from app.services.faq_index import faq_index
+    from app.services.response_cache import chat_answer_cache, diet_plan_cache
+
+    combined = AIMetrics()
+    combined.absorb(metrics.export())
+    try:
+        snapshots = published_snapshots()
+    except Exception:
+        db.session.rollback()
+        snapshots = []
+    for snapshot in snapshots:
+        combined.absorb(snapshot.metrics)
+
+    return jsonify({
+        'tiers': router.snapshot(),
+        'methods': combined.snapshot(),
+        'processes': [{
+            'process': snapshot.process_key,
+            'role': snapshot.role,
+            'updated_at': snapshot.updated_at.isoformat()
+        } for snapshot in snapshots],
+        'caches': {
+            'diet_plan': diet_plan_cache.stats(
+                (snapshot.caches or {}).get('diet_plan', {}) for snapshot in snapshots
+            ),
+            'chat_answer': chat_answer_cache.stats(),
+            'faq': faq_index.stats()
+        }
+    }), 200
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
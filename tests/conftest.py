@@ -0,0 +1,53 @@
+"""Shared fixtures: the app on an in-memory database with the local fake model"""
+
+import os
+
+import pytest
+
+# Set before anything imports app, and never point the tests at a real database from .env
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret')
+os.environ.setdefault('SECRET_KEY', 'test-secret')
+os.environ['GEMINI_BACKEND'] = 'fake'
+os.environ['FAKE_GEMINI_PROFILE'] = 'instant'
+
+
+@pytest.fixture
+def app():
+    pytest.importorskip('flask_sqlalchemy')
+    from app import create_app, db
+    from app.services.challenge_catalog import catalog
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    catalog.invalidate()
+
+
+@pytest.fixture
+def user_id(app):
+    from app import db
+    from app.models.role import Role
+    from app.models.user import User
+
+    role = Role(role_name='user')
+    db.session.add(role)
+    db.session.flush()
+    user = User(username='runner', email='runner@example.com', password_hash='x', role_id=role.id)
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+@pytest.fixture
+def client(app, user_id):
+    from flask_jwt_extended import create_access_token
+
+    token = create_access_token(identity=str(user_id))
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
@@ -0,0 +1,116 @@
+"""Query-count regression tests for the challenge listing endpoints
+
+The user's join state and today's progress must be resolved in a fixed
+number of statements, however many of the listed challenges they joined.
+"""
+
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+pytest.importorskip('flask_jwt_extended')
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import db
+from app.models.challenge import Challenge, ChallengeProgress, UserChallenge
+from app.models.user import User
+from app.services.challenge_catalog import catalog
+
+CHALLENGES = 12
+
+
+@pytest.fixture(autouse=True)
+def challenges(app):
+    db.session.add_all(
+        Challenge(title=f'Challenge {index}', type='Strength', duration='30 Days', difficulty='Beginner')
+        for index in range(CHALLENGES)
+    )
+    db.session.commit()
+
+
+def join(user_id, count, mark_today=False):
+    """Join the first count challenges, optionally marking today's progress on each"""
+    for challenge in Challenge.query.order_by(Challenge.id).limit(count):
+        user_challenge = UserChallenge(user_id=user_id, challenge_id=challenge.id)
+        db.session.add(user_challenge)
+        if mark_today:
+            db.session.flush()
+            db.session.add(ChallengeProgress(user_challenge_id=user_challenge.id, progress_date=date.today()))
+    db.session.commit()
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def statements_for(client, path):
+    # Same cache state for every measurement: a cold catalogue page
+    catalog.invalidate()
+    db.session.expire_all()
+    with count_statements() as statements:
+        response = client.get(path)
+    assert response.status_code == 200, response.get_json()
+    return len(statements), response.get_json()
+
+
+@pytest.mark.parametrize('mark_today', [False, True])
+def test_all_challenges_query_count_does_not_grow_with_joins(client, user_id, mark_today):
+    join(user_id, 1, mark_today)
+    one, body = statements_for(client, '/api/challenges/')
+    assert sum(item['is_joined'] for item in body['challenges']) == 1
+
+    UserChallenge.query.delete()
+    ChallengeProgress.query.delete()
+    db.session.commit()
+    join(user_id, CHALLENGES, mark_today)
+    many, body = statements_for(client, '/api/challenges/')
+    assert sum(item['is_joined'] for item in body['challenges']) == CHALLENGES
+    assert all(item['can_mark_today'] is not mark_today for item in body['challenges'])
+
+    assert one == many
+
+
+@pytest.mark.parametrize('mark_today', [False, True])
+def test_my_challenges_query_count_does_not_grow_with_joins(client, user_id, mark_today):
+    join(user_id, 1, mark_today)
+    one, body = statements_for(client, '/api/challenges/my-challenges')
+    assert len(body['challenges']) == 1
+
+    UserChallenge.query.delete()
+    ChallengeProgress.query.delete()
+    db.session.commit()
+    join(user_id, CHALLENGES, mark_today)
+    many, body = statements_for(client, '/api/challenges/my-challenges')
+    assert len(body['challenges']) == CHALLENGES
+
+    assert one == many
+
+
+def test_catalogue_page_is_shared_between_users(app, client, user_id):
+    other = User(username='walker', email='walker@example.com', password_hash='x', role_id=User.query.get(user_id).role_id)
+    db.session.add(other)
+    db.session.commit()
+    other_client = app.test_client()
+    other_client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {create_access_token(identity=str(other.id))}'
+
+    cold, _ = statements_for(client, '/api/challenges/')
+    db.session.expire_all()
+    with count_statements() as statements:
+        assert other_client.get('/api/challenges/').status_code == 200
+    # Another user's request is served from the cached page: only the probe and the overlay run
+    assert len(statements) < cold
@@ -0,0 +1,49 @@
+"""Generated challenges are stored once and linked to every user they were generated for"""
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+
+from app import db
+from app.models.challenge import Challenge, ChallengeSuggestion
+from app.models.user import User
+from app.services.challenge_service import save_generated_challenges
+from app.services.gemini_service import DEFAULT_CHALLENGES
+
+SUGGESTIONS = [
+    {'title': '14-Day Plank Challenge', 'type': 'Core', 'duration': '14 Days', 'difficulty': 'Beginner', 'goal': 'Core Strength'},
+    {'title': '7-Day Walking Challenge', 'type': 'Cardio', 'duration': '7 Days', 'difficulty': 'Beginner', 'goal': 'Weight Loss'}
+]
+
+
+@pytest.fixture
+def other_user_id(user_id):
+    other = User(username='walker', email='walker@example.com', password_hash='x', role_id=User.query.get(user_id).role_id)
+    db.session.add(other)
+    db.session.commit()
+    return other.id
+
+
+def links():
+    return set(db.session.query(ChallengeSuggestion.user_id, ChallengeSuggestion.challenge_id))
+
+
+def test_repeated_content_is_shared_and_linked_to_each_requester(user_id, other_user_id):
+    first = save_generated_challenges(user_id, SUGGESTIONS)
+    db.session.commit()
+    second = save_generated_challenges(other_user_id, SUGGESTIONS)
+    db.session.commit()
+
+    assert [challenge['reused'] for challenge in first] == [False, False]
+    assert [challenge['id'] for challenge in second] == [challenge['id'] for challenge in first]
+    assert all(challenge['reused'] for challenge in second)
+    assert Challenge.query.count() == len(SUGGESTIONS)
+    assert links() == {(owner, challenge['id']) for owner in (user_id, other_user_id) for challenge in first}
+
+
+def test_fallback_challenges_are_not_linked(user_id):
+    saved = save_generated_challenges(user_id, DEFAULT_CHALLENGES)
+    db.session.commit()
+
+    assert len(saved) == len(DEFAULT_CHALLENGES)
+    assert links() == set()
@@ -0,0 +1,95 @@
+"""Conversation context: every earlier turn reaches the model, verbatim or through the summary"""
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+
+from app import db
+from app.models.chat_thread import ChatThread
+from app.models.chatbot_query import ChatbotQuery
+from app.models.generation_job import GenerationJob
+from app.services import chat_context
+from app.services.chat_context import RECENT_TURNS, SUMMARY_BATCH, history_for, record_turn, refresh_summary
+
+TURNS = RECENT_TURNS + 4 * SUMMARY_BATCH + 3
+
+
+@pytest.fixture
+def thread(app, user_id):
+    thread = ChatThread(user_id=user_id)
+    db.session.add(thread)
+    db.session.commit()
+    return thread
+
+
+def ask(thread, index):
+    query = ChatbotQuery(user_id=thread.user_id, question=f'question {index}', answer=f'answer {index}')
+    db.session.add(query)
+    db.session.flush()
+    record_turn(thread, query)
+    db.session.commit()
+    return query.id
+
+
+def run_summary_jobs():
+    for job in GenerationJob.query.filter_by(kind='chat_summary', status='queued').all():
+        refresh_summary(job.payload['thread_id'])
+        job.status = 'succeeded'
+    db.session.commit()
+
+
+def covered(thread, history):
+    """Ids of the turns the next prompt carries, folded into the summary or sent verbatim"""
+    db.session.refresh(thread)
+    sent = {question for question, _ in history['turns']}
+    return {
+        turn_id for turn_id, question in db.session.query(ChatbotQuery.id, ChatbotQuery.question)
+        .filter(ChatbotQuery.thread_id == thread.id)
+        if turn_id <= thread.summarized_through_id or question in sent
+    }
+
+
+@pytest.mark.parametrize('summarize', [True, False])
+def test_no_turn_goes_missing_between_requests(thread, summarize):
+    asked = []
+    for index in range(TURNS):
+        if summarize:
+            # What the worker does between requests
+            run_summary_jobs()
+        db.session.refresh(thread)
+        history = history_for(thread)
+        if summarize or len(asked) <= RECENT_TURNS + SUMMARY_BATCH:
+            assert covered(thread, history) == set(asked), f'before turn {index}'
+        assert len(history['turns']) <= RECENT_TURNS + SUMMARY_BATCH
+        asked.append(ask(thread, index))
+
+    if summarize:
+        run_summary_jobs()
+        db.session.refresh(thread)
+        assert thread.summary
+        # Only whole batches are folded; the rest are still sent verbatim
+        assert thread.summarized_turns == 4 * SUMMARY_BATCH
+        assert covered(thread, history_for(thread)) == set(asked)
+
+
+def test_summary_lost_to_a_concurrent_writer_is_dropped(thread, monkeypatch):
+    for index in range(RECENT_TURNS + SUMMARY_BATCH):
+        ask(thread, index)
+
+    real = chat_context.clip
+
+    def moved_watermark(text, limit):
+        # Another summary for this thread lands while the model is still answering
+        if limit == chat_context.MAX_SUMMARY_CHARS:
+            db.session.execute(
+                db.update(ChatThread).where(ChatThread.id == thread.id)
+                .values(summary='newer', summarized_through_id=ChatThread.summarized_through_id + 1)
+            )
+        return real(text, limit)
+
+    monkeypatch.setattr(chat_context, 'clip', moved_watermark)
+    assert refresh_summary(thread.id) is None
+    db.session.commit()
+    db.session.refresh(thread)
+    assert thread.summary == 'newer'
+    assert thread.summarized_turns == 0
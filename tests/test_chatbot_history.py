@@ -0,0 +1,66 @@
+"""Deleting chat history keeps curated FAQ answers and thread counters consistent"""
+
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+
+from app import db
+from app.models.chat_thread import ChatThread
+from app.models.chatbot_query import ChatbotQuery
+from app.services.chat_context import record_turn
+
+
+@pytest.fixture
+def thread(app, user_id):
+    thread = ChatThread(user_id=user_id, summary='earlier talk', summarized_through_id=1, summarized_turns=1)
+    db.session.add(thread)
+    db.session.commit()
+    for index in range(3):
+        query = ChatbotQuery(user_id=user_id, question=f'question {index}', answer=f'answer {index}', query_type='diet')
+        db.session.add(query)
+        db.session.flush()
+        record_turn(thread, query)
+    db.session.commit()
+    return thread
+
+
+@pytest.fixture
+def faq_id(thread):
+    query = ChatbotQuery.query.filter_by(thread_id=thread.id).order_by(ChatbotQuery.id).first()
+    query.is_faq = True
+    query.faq_updated_at = datetime.utcnow()
+    db.session.commit()
+    return query.id
+
+
+def test_clear_history_keeps_faq_rows_and_recounts_threads(client, thread, faq_id):
+    assert client.delete('/api/chatbot/history').status_code == 200
+
+    db.session.expire_all()
+    assert [query.id for query in ChatbotQuery.query.all()] == [faq_id]
+    thread = db.session.get(ChatThread, thread.id)
+    assert thread.turn_count == 1
+    assert (thread.summary, thread.summarized_through_id, thread.summarized_turns) == (None, 0, 0)
+
+
+def test_delete_thread_detaches_faq_rows(client, thread, faq_id):
+    assert client.delete(f'/api/chatbot/threads/{thread.id}').status_code == 200
+
+    db.session.expire_all()
+    assert db.session.get(ChatThread, thread.id) is None
+    assert [(query.id, query.thread_id) for query in ChatbotQuery.query.all()] == [(faq_id, None)]
+
+
+def test_curated_answer_cannot_be_deleted_directly(client, faq_id):
+    assert client.delete(f'/api/chatbot/{faq_id}').status_code == 409
+    assert db.session.get(ChatbotQuery, faq_id) is not None
+
+
+def test_deleting_a_turn_recounts_its_thread(client, thread):
+    turn_id = ChatbotQuery.query.filter_by(thread_id=thread.id).order_by(ChatbotQuery.id.desc()).first().id
+    assert client.delete(f'/api/chatbot/{turn_id}').status_code == 200
+
+    db.session.expire_all()
+    assert db.session.get(ChatThread, thread.id).turn_count == 2
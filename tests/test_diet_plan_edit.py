@@ -0,0 +1,57 @@
+"""Editing a diet plan validates the meal plan and ignores fields that are not editable"""
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+
+from app import db
+from app.models.diet_plan import DietPlan
+from app.utils.diet_plan_schema import normalize_diet_plan, totals_columns
+
+GENERATED = normalize_diet_plan({'meals': [{'name': 'Lunch', 'items': [
+    {'name': 'Lentil soup', 'calories': 380, 'protein_g': 18, 'carbs_g': 52, 'fat_g': 8}
+]}]})
+EDITED = {'meals': [{'name': 'Lunch', 'items': [
+    {'name': 'Lentil soup', 'calories': '380 kcal', 'protein_g': 18, 'carbs_g': 52, 'fat_g': 8},
+    {'name': 'Greek yogurt', 'calories': 150, 'protein_g': 15, 'carbs_g': 6, 'fat_g': 4, 'verified': True}
+]}]}
+
+
+@pytest.fixture
+def plan_id(user_id):
+    plan = DietPlan(
+        user_id=user_id,
+        diet_plan={'user_info': {'goal': 'weight_loss'}, 'meal_plan': GENERATED, 'generated_by': 'gemini-ai'},
+        goal='weight_loss',
+        **totals_columns(GENERATED)
+    )
+    db.session.add(plan)
+    db.session.commit()
+    return plan.id
+
+
+def test_only_the_meal_plan_is_merged(client, plan_id):
+    response = client.put(f'/api/diet/{plan_id}', json={'diet_plan': {
+        'meal_plan': EDITED,
+        'generated_by': 'me',
+        'user_info': {'goal': 'weight_gain'},
+        'is_admin': True
+    }})
+
+    assert response.status_code == 200
+    db.session.expire_all()
+    plan = db.session.get(DietPlan, plan_id)
+    assert set(plan.diet_plan) == {'user_info', 'meal_plan', 'generated_by'}
+    assert plan.diet_plan['generated_by'] == 'gemini-ai'
+    assert plan.diet_plan['user_info'] == {'goal': 'weight_loss'}
+    assert plan.diet_plan['meal_plan'] == normalize_diet_plan(EDITED)
+    assert 'verified' not in plan.diet_plan['meal_plan']['meals'][0]['items'][1]
+    assert (plan.total_calories, plan.protein_g) == (530, 33)
+
+
+def test_invalid_meal_plan_is_rejected(client, plan_id):
+    response = client.put(f'/api/diet/{plan_id}', json={'diet_plan': {'meal_plan': {'meals': []}}})
+
+    assert response.status_code == 400
+    db.session.expire_all()
+    assert db.session.get(DietPlan, plan_id).diet_plan['meal_plan'] == GENERATED
@@ -0,0 +1,130 @@
+"""Single-flight coalescing and tier routing, run against the local fake model"""
+
+import threading
+import time
+
+import pytest
+
+from app.services.fake_gemini import FakeGenerativeModel
+from app.services.gemini_service import GeminiService, GeminiUnavailableError, SingleFlight, router
+from app.services.model_router import ModelRouter, ModelTier
+
+
+@pytest.fixture
+def upstream_calls(monkeypatch):
+    """Model names of every request that reached the fake upstream, which answers after 0.2s"""
+    calls = []
+    real = FakeGenerativeModel.generate_content
+
+    def generate_content(model, prompt, **kwargs):
+        calls.append(model.model_name)
+        time.sleep(0.2)
+        return real(model, prompt, **kwargs)
+
+    monkeypatch.setattr(FakeGenerativeModel, 'generate_content', generate_content)
+    return calls
+
+
+@pytest.fixture
+def closed_breakers():
+    yield
+    for tier in router.tiers.values():
+        tier.breaker.record_success()
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def run_concurrently(count, fn):
+    results = [None] * count
+    start = threading.Barrier(count)
+
+    def worker(index):
+        start.wait()
+        try:
+            results[index] = fn()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_single_flight_runs_one_leader_for_concurrent_callers():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'answer'
+
+    assert run_concurrently(8, lambda: flight.do('key', slow)) == ['answer'] * 8
+    assert len(calls) == 1
+    # Nothing is retained once the leader finishes
+    assert flight.do('key', lambda: 'fresh') == 'fresh'
+
+
+def test_single_flight_shares_the_leaders_error():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.2)
+        raise RuntimeError('upstream down')
+
+    results = run_concurrently(4, lambda: flight.do('key', failing))
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_identical_questions_reach_the_model_once(upstream_calls, closed_breakers):
+    service = GeminiService()
+    answers = run_concurrently(6, lambda: service.chat_response('How much protein is in an egg?'))
+
+    assert len(set(answers)) == 1 and isinstance(answers[0], str)
+    assert len(upstream_calls) == 1
+
+
+def tiers():
+    lite = ModelTier('lite', 'models/lite', timeout=1, max_concurrency=2, latency_budget=1)
+    standard = ModelTier('standard', 'models/standard', timeout=1, max_concurrency=2, latency_budget=1)
+    return lite, standard
+
+
+def test_router_downgrades_to_lite_when_standard_is_open():
+    lite, standard = tiers()
+    router = ModelRouter(lite=lite, standard=standard, lite_max_chars=20)
+    assert router.choose(question_chars=500) == (standard, False)
+    assert router.choose(structured=True) == (standard, False)
+
+    open_breaker(standard.breaker)
+    assert router.choose(question_chars=500) == (lite, True)
+    assert router.choose(structured=True) == (lite, True)
+    assert router.unavailable_for(structured=True) is None
+
+    # Nowhere better to go: stay, and report when the preferred tier takes calls again
+    open_breaker(lite.breaker)
+    assert router.choose(structured=True) == (standard, False)
+    assert router.unavailable_for(structured=True) > 0
+
+
+def test_service_answers_from_lite_while_standard_is_open(upstream_calls, closed_breakers):
+    open_breaker(router.tiers[ModelRouter.STANDARD].breaker)
+    question = 'What should I eat before a long run? ' * 20
+
+    assert GeminiService().chat_response(question)
+    assert upstream_calls == [router.tiers[ModelRouter.LITE].model_name]
+
+
+def test_service_is_unavailable_when_every_tier_is_open(upstream_calls, closed_breakers):
+    for tier in router.tiers.values():
+        open_breaker(tier.breaker)
+
+    with pytest.raises(GeminiUnavailableError):
+        GeminiService().chat_response('Is rice healthy?')
+    assert upstream_calls == []
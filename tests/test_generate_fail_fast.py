@@ -0,0 +1,63 @@
+"""Generate endpoints answer at once, without queueing a job, while the model is refusing calls"""
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+
+from app.models.generation_job import GenerationJob
+from app.services.gemini_service import DEFAULT_CHALLENGES, router
+from app.services.response_cache import diet_plan_cache
+from app.utils.diet_plan_schema import normalize_diet_plan
+
+PROFILE = {
+    'age': 28, 'gender': 'female', 'weight': 62, 'height': 165,
+    'activity_level': 'moderate', 'goal': 'weight_loss', 'diet_type': 'vegetarian'
+}
+PLAN = normalize_diet_plan({'meals': [{'name': 'Breakfast', 'items': [
+    {'name': 'Oatmeal', 'quantity': '1 bowl', 'calories': 320, 'protein_g': 12, 'carbs_g': 54, 'fat_g': 6}
+]}]})
+
+
+@pytest.fixture
+def breakers_open(app):
+    breakers = [tier.breaker for tier in router.tiers.values()]
+    for breaker in breakers:
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+    yield
+    for breaker in breakers:
+        breaker.record_success()
+    diet_plan_cache.memory.clear()
+
+
+def test_diet_plan_is_refused_with_retry_after(client, breakers_open):
+    response = client.post('/api/diet/generate', json=PROFILE)
+
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    assert GenerationJob.query.count() == 0
+
+
+def test_diet_plan_is_served_from_cache(client, breakers_open):
+    diet_plan_cache.memory.set(diet_plan_cache.cache_key(diet_plan_cache.profile_key(PROFILE)), PLAN)
+
+    response = client.post('/api/diet/generate', json=PROFILE)
+
+    assert response.status_code == 201
+    assert response.get_json()['diet_plan']['plan']['meal_plan'] == PLAN
+    assert GenerationJob.query.count() == 0
+
+
+def test_challenges_fall_back_without_queueing(client, breakers_open):
+    response = client.post('/api/challenges/generate', json={'age': 30, 'goal': 'Strength'})
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['source'] == 'fallback'
+    assert [challenge['title'] for challenge in body['challenges']] == [c['title'] for c in DEFAULT_CHALLENGES]
+    assert GenerationJob.query.count() == 0
+
+
+def test_jobs_are_queued_while_a_tier_accepts_calls(client):
+    assert client.post('/api/diet/generate', json=PROFILE).status_code == 202
+    assert GenerationJob.query.count() == 1
@@ -0,0 +1,73 @@
+"""Incremental JSON array parsing across arbitrary chunk boundaries"""
+
+import json
+import random
+
+import pytest
+
+from app.utils.json_stream import JSONArrayStream, parse_json_array
+
+ITEMS = [
+    {'title': '7-Day Plank', 'duration': '7 Days', 'tags': ['core', 'beginner'], 'notes': 'hold [30] seconds, then rest'},
+    {'title': 'Escaped "quotes" and } braces', 'sets': 3, 'weight': 12.5, 'optional': None},
+    {'title': 'Unicode • ✓', 'nested': {'days': [1, 2, 3], 'ok': True}}
+]
+TEXT = 'Sure! Here are [3] challenges:\n```json\n' + json.dumps(ITEMS, indent=2) + '\n```\nEnjoy.'
+
+
+def chunked(text, sizes):
+    position = 0
+    for size in sizes:
+        if position >= len(text):
+            return
+        yield text[position:position + size]
+        position += size
+    if position < len(text):
+        yield text[position:]
+
+
+def feed_all(chunks):
+    stream = JSONArrayStream()
+    items = []
+    for chunk in chunks:
+        items.extend(stream.feed(chunk))
+    stream.close()
+    return items
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, len(TEXT)])
+def test_fixed_chunk_sizes(size):
+    assert feed_all(chunked(TEXT, [size] * len(TEXT))) == ITEMS
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_chunk_boundaries(seed):
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 12) for _ in range(len(TEXT))]
+    assert feed_all(chunked(TEXT, sizes)) == ITEMS
+
+
+def test_items_are_yielded_as_soon_as_they_close():
+    stream = JSONArrayStream()
+    first = json.dumps(ITEMS[0])
+    assert stream.feed('[' + first[:-1]) == []
+    assert stream.feed('}, {"title"') == [ITEMS[0]]
+    assert stream.feed(': "next"}]') == [{'title': 'next'}]
+    assert stream.done
+
+
+def test_bracket_split_from_its_object_waits_for_more_text():
+    stream = JSONArrayStream()
+    assert stream.feed('Top [') == []
+    assert stream.feed('  ') == []
+    assert stream.feed('{"a": 1}]') == [{'a': 1}]
+
+
+@pytest.mark.parametrize('text, message', [
+    ('no array at all', 'No JSON array of objects'),
+    ('Here are [5] items', 'No JSON array of objects'),
+    ('[{"a": 1}, {"b": 2}', 'not terminated'),
+])
+def test_incomplete_streams_raise(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse_json_array(text)
@@ -0,0 +1,28 @@
+"""Leaderboard rankings stay bounded and unknown challenges are rejected"""
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+
+from app import db
+from app.models.challenge import Challenge, ChallengeLeaderboardEntry
+from app.services.leaderboard_service import LeaderboardService
+
+
+def test_rankings_are_bounded(app, user_id):
+    challenges = [Challenge(title=f'Challenge {index}', duration='7 Days') for index in range(5)]
+    db.session.add_all(challenges)
+    db.session.flush()
+    db.session.add_all(ChallengeLeaderboardEntry(challenge_id=challenge.id, user_id=user_id, days_completed=1)
+                       for challenge in challenges)
+    db.session.commit()
+
+    service = LeaderboardService(refresh_seconds=60, max_challenges=2)
+    for challenge in challenges:
+        assert service.rank(challenge.id, user_id) == (1, 1, 1)
+    assert len(service._rankings) == 2
+
+
+@pytest.mark.parametrize('path', ['/api/challenges/999/leaderboard', '/api/challenges/999/leaderboard/me'])
+def test_unknown_challenge_is_not_found(client, path):
+    assert client.get(path).status_code == 404
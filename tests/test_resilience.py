@@ -0,0 +1,139 @@
+"""Circuit breaker, deadlines and the concurrency cap of ResilientCaller"""
+
+import threading
+import time
+
+import pytest
+
+from app.services.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, ResilientCaller
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_open_breaker_rejects_without_waiting_for_a_slot():
+    breaker = CircuitBreaker('upstream', failure_threshold=2, reset_timeout=60)
+    caller = ResilientCaller(breaker, timeout=5, max_retries=0, max_concurrency=1)
+    # An abandoned call still holds the only slot
+    caller.limiter.acquire(timeout=0)
+    open_breaker(breaker)
+
+    started = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        caller.call(lambda: 'unreachable')
+    assert time.monotonic() - started < 0.5
+    assert breaker.snapshot()['rejected_calls'] == 1
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    breaker = CircuitBreaker('upstream', failure_threshold=1, reset_timeout=0.05)
+    caller = ResilientCaller(breaker, timeout=5, max_retries=0, max_concurrency=4)
+    open_breaker(breaker)
+    time.sleep(0.06)
+    assert not breaker.is_open()
+
+    release = threading.Event()
+    calls = []
+    outcomes = []
+
+    def probe():
+        calls.append(1)
+        release.wait(5)
+        return 'ok'
+
+    def attempt():
+        try:
+            outcomes.append(caller.call(probe))
+        except CircuitOpenError:
+            outcomes.append('rejected')
+
+    threads = [threading.Thread(target=attempt) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 2
+    while outcomes.count('rejected') < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(outcomes) == ['ok', 'rejected', 'rejected', 'rejected']
+    assert breaker.snapshot()['state'] == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('upstream', failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.snapshot()['state'] == CircuitBreaker.OPEN
+    assert breaker.is_open()
+    assert not breaker.allow()
+    assert 0 < breaker.retry_in() <= 60
+
+
+def test_failed_probe_reopens_and_successful_probe_closes():
+    breaker = CircuitBreaker('upstream', failure_threshold=1, reset_timeout=0.05)
+    open_breaker(breaker)
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    assert breaker.snapshot()['state'] == CircuitBreaker.HALF_OPEN
+    # The probe is out: everyone else is turned away
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.snapshot()['state'] == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.snapshot()['state'] == CircuitBreaker.CLOSED
+    assert not breaker.is_open()
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    breaker = CircuitBreaker('upstream', failure_threshold=1, reset_timeout=60)
+    caller = ResilientCaller(breaker, timeout=1, max_retries=3, backoff_base=0)
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise ValueError('malformed prompt')
+
+    with pytest.raises(ValueError):
+        caller.call(bad_request)
+    assert len(calls) == 1
+    assert breaker.snapshot()['state'] == CircuitBreaker.CLOSED
+
+
+def test_transient_errors_are_retried_then_open_the_breaker():
+    breaker = CircuitBreaker('upstream', failure_threshold=2, reset_timeout=60)
+    caller = ResilientCaller(breaker, timeout=1, max_retries=1, backoff_base=0)
+    calls = []
+
+    def unavailable():
+        calls.append(1)
+        raise ConnectionError('reset by peer')
+
+    with pytest.raises(ConnectionError):
+        caller.call(unavailable)
+    assert len(calls) == 2
+    assert breaker.is_open()
+
+
+def test_deadline_counts_as_a_failure():
+    breaker = CircuitBreaker('upstream', failure_threshold=1, reset_timeout=60)
+    caller = ResilientCaller(breaker, timeout=0.05, max_retries=0)
+
+    with pytest.raises(DeadlineExceeded):
+        caller.call(lambda: time.sleep(0.5))
+    assert breaker.is_open()
@@ -0,0 +1,48 @@
+"""Whole-word and prefix matching of the diet topic vocabulary"""
+
+import pytest
+
+from app.utils.topic_classifier import is_diet_question
+
+
+@pytest.mark.parametrize('question', [
+    'How many calories are in a banana?',
+    'Is beef stew a good dinner for bulking?',
+    'Are black beans high in protein?',
+    'Can I eat a chicken wrap before training?',
+    'Are grapes too sugary for diabetics?',
+    'Is baked fish better than fried fish?',
+    'Should I take a fiber supplement?',
+    'How much salt is too much per day?',
+    'Is olive oil healthy for cooking?',
+    'Does ginger help with bloating?',
+    'Are potato chips ever okay on a diet?',
+    'What is a good paleo lunch?',
+])
+def test_on_topic(question):
+    assert is_diet_question(question)
+
+
+@pytest.mark.parametrize('question', [
+    'What does good stewardship of a company look like?',
+    'How do I write a wrapper class in Python?',
+    'How do I run a beanstalk work queue?',
+    'Which chipset does this laptop use?',
+    'I heard it through the grapevine, is it true?',
+    'What is the capital of Turkey?',
+    'How do lambda functions work?',
+    'How do I remove boilerplate code?',
+    'Who is Oliver Twist?',
+    'How does a kaleidoscope work?',
+    'Is fiberglass safe to touch?',
+    'Where are the supplementary exam materials?',
+    'Is this parameter tunable at runtime?',
+    'He stepped gingerly onto the ice',
+    'Was the meeting fruitful?',
+    'What did Milton Friedman argue?',
+    'Why is my boiler making noise?',
+    'Which Mediterranean islands are worth a cruise?',
+    'Is the network failure intermittent?',
+])
+def test_off_topic(question):
+    assert not is_diet_question(question)
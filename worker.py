@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Run queued AI generation jobs outside the web workers
+
+Usage: python worker.py
+"""
+
+from dotenv import load_dotenv
+import os
+import signal
+import time
+
+load_dotenv()
+
+POLL_INTERVAL = float(os.getenv('JOB_POLL_SECONDS', 1.0))
+STALE_CHECK_INTERVAL = 60
+# How often AI metrics are written where /health/ai can read them
+METRICS_PUBLISH_INTERVAL = float(os.getenv('AI_METRICS_PUBLISH_SECONDS', 30))
+
+_running = True
+
+
+def _stop(signum, frame):
+    global _running
+    print("\n🛑 Stopping after the current job...")
+    _running = False
+
+
+def _publish_metrics():
+    from app import db
+    from app.services import ai_metrics
+    from app.services.response_cache import diet_plan_cache
+
+    try:
+        ai_metrics.publish('worker', caches={'diet_plan': diet_plan_cache.raw_stats()})
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️  Could not publish AI metrics: {e}")
+
+
+def main():
+    from app import create_app
+    from app.services import job_service
+
+    app = create_app()
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    print("\n" + "="*70)
+    print("  ⚙️  AI GENERATION WORKER")
+    print("="*70)
+    print(f"🔁 Poll interval: {POLL_INTERVAL}s")
+    print("="*70 + "\n")
+
+    last_stale_check = 0
+    last_metrics_publish = 0
+    with app.app_context():
+        while _running:
+            if time.monotonic() - last_stale_check > STALE_CHECK_INTERVAL:
+                requeued = job_service.requeue_stale()
+                if requeued:
+                    print(f"⚠️  Requeued {requeued} stale job(s)")
+                last_stale_check = time.monotonic()
+
+            if time.monotonic() - last_metrics_publish > METRICS_PUBLISH_INTERVAL:
+                _publish_metrics()
+                last_metrics_publish = time.monotonic()
+
+            job = job_service.claim_next()
+            if job is None:
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            started = time.monotonic()
+            job = job_service.run(job)
+            print(f"{'✓' if job.status == 'succeeded' else '✗'} {job.kind} job {job.id} "
+                  f"{job.status} in {time.monotonic() - started:.2f}s")
+
+        _publish_metrics()
+
+
+if __name__ == '__main__':
+    main()